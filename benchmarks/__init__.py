@@ -0,0 +1,7 @@
+"""Stand-alone benchmarks, each run as python -m benchmarks.<name> from the repository
+root; --help prints what a benchmark measures and its options.
+
+data/env.py refuses to load without the POSTGRES_* variables, so they must be set even
+for benchmarks that never connect; any values will do there. Only load_test and
+measure_rss start a server, which needs a real database.
+"""
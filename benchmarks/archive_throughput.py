@@ -0,0 +1,62 @@
+"""Decode throughput of loose files against the same images inside zip and tar archives.
+
+    python -m benchmarks.archive_throughput --folder /data/sample --max-images 200
+
+The images of the folder are packed into a temporary stored zip, deflated zip and tar,
+then each source is decoded with iter_decoded the way DetectionTask does, after one
+untimed pass to warm the page cache.
+"""
+import argparse
+import os
+import tarfile
+import tempfile
+import time
+import zipfile
+from classification.archives import member_path
+from classification.sources import ReadFailure, iter_decoded, list_images
+
+def build_archives(image_paths, directory):
+    names = [os.path.basename(path) for path in image_paths]
+    archives = {}
+    for label, compression in (('zip (stored)', zipfile.ZIP_STORED), ('zip (deflated)', zipfile.ZIP_DEFLATED)):
+        path = os.path.join(directory, f"{compression}.zip")
+        with zipfile.ZipFile(path, 'w', compression) as archive:
+            for image_path, name in zip(image_paths, names):
+                archive.write(image_path, name)
+        archives[label] = [member_path(path, name) for name in names]
+    path = os.path.join(directory, "images.tar")
+    with tarfile.open(path, 'w') as archive:
+        for image_path, name in zip(image_paths, names):
+            archive.add(image_path, name)
+    archives['tar'] = [member_path(path, name) for name in names]
+    return archives
+
+def decode_rate(paths, threads):
+    for _ in iter_decoded(paths, threads):
+        pass
+    start_time = time.perf_counter()
+    decoded = sum(img is not None and not isinstance(img, ReadFailure) for img in iter_decoded(paths, threads))
+    return decoded, decoded / (time.perf_counter() - start_time)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--folder', required=True)
+    parser.add_argument('--max-images', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=None)
+    args = parser.parse_args()
+
+    image_paths = list_images(args.folder, args.max_images)
+    if not image_paths:
+        raise SystemExit(f"No images found in {args.folder}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        sources = {'loose files': image_paths, **build_archives(image_paths, directory)}
+        baseline = None
+        print(f"{'source':<16} {'images':>6} {'images/s':>9} {'vs loose':>8}")
+        for label, paths in sources.items():
+            decoded, rate = decode_rate(paths, args.threads)
+            baseline = baseline or rate
+            print(f"{label:<16} {decoded:>6} {rate:>9.1f} {rate / baseline:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
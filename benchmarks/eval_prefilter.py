@@ -0,0 +1,83 @@
+"""Evaluate the scene pre-filter against a labelled folder.
+
+    python -m benchmarks.eval_prefilter --folder /data/sea_eval --category sea --with-model
+
+The folder holds a positive/ and a negative/ subfolder of images. Each image is scored
+once, then for every threshold the script reports the recall lost on positives, the
+share of negatives rejected and the share of detector calls saved. With --with-model
+the detector is loaded and timed, so saved compute is also reported in seconds per
+1000 images net of the pre-filter's own cost.
+"""
+import argparse
+import os
+import time
+import cv2
+from classification.prefilter import SCORERS, THRESHOLDS
+from classification.sources import list_images
+
+DEFAULT_THRESHOLDS = "0,0.01,0.02,0.05,0.1,0.15,0.2,0.3,0.4,0.5"
+
+def score_folder(category, folder, max_images):
+    scores, seconds = [], 0.0
+    for image_path in list_images(folder, max_images):
+        img = cv2.imread(image_path)
+        if img is None:
+            continue
+        start_time = time.perf_counter()
+        scores.append(SCORERS[category](img))
+        seconds += time.perf_counter() - start_time
+    return scores, seconds
+
+def time_model(category, image_paths):
+    from classification.registry import detect_image, get_detector
+    detector = get_detector(category)
+    images = [img for img in (cv2.imread(path) for path in image_paths) if img is not None]
+    detect_image(category, detector, image_paths[0], img=images[0])
+    start_time = time.perf_counter()
+    for image_path, img in zip(image_paths, images):
+        detect_image(category, detector, image_path, img=img)
+    return (time.perf_counter() - start_time) / max(1, len(images))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--folder', required=True)
+    parser.add_argument('--category', choices=sorted(SCORERS), default='sea')
+    parser.add_argument('--thresholds', default=DEFAULT_THRESHOLDS)
+    parser.add_argument('--max-images', type=int, default=1000)
+    parser.add_argument('--with-model', action='store_true')
+    parser.add_argument('--model-images', type=int, default=20, help="images used to time the detector")
+    args = parser.parse_args()
+
+    positives, positive_seconds = score_folder(args.category, os.path.join(args.folder, 'positive'), args.max_images)
+    negatives, negative_seconds = score_folder(args.category, os.path.join(args.folder, 'negative'), args.max_images)
+    total = len(positives) + len(negatives)
+    if not positives or not negatives:
+        raise SystemExit("Both positive/ and negative/ need at least one readable image.")
+    prefilter_cost = (positive_seconds + negative_seconds) / total
+
+    model_cost = None
+    if args.with_model:
+        sample = list_images(os.path.join(args.folder, 'positive'), args.model_images // 2)
+        sample += list_images(os.path.join(args.folder, 'negative'), args.model_images - len(sample))
+        model_cost = time_model(args.category, sample)
+
+    print(f"{args.category}: {len(positives)} positives, {len(negatives)} negatives, "
+          f"pre-filter {prefilter_cost * 1000:.2f} ms/image"
+          + (f", detector {model_cost * 1000:.1f} ms/image" if model_cost is not None else ""))
+    print(f"current threshold: {THRESHOLDS[args.category]}\n")
+    header = f"{'threshold':>9} {'recall':>7} {'recall_loss':>11} {'neg_rejected':>12} {'calls_saved':>11}"
+    print(header + (f" {'s_saved/1k':>10}" if model_cost is not None else ""))
+
+    for threshold in [float(t) for t in args.thresholds.split(',') if t.strip()]:
+        recall = sum(score >= threshold for score in positives) / len(positives)
+        negatives_rejected = sum(score < threshold for score in negatives) / len(negatives)
+        rejected = sum(score < threshold for score in positives + negatives)
+        line = (f"{threshold:>9.3f} {recall:>7.3f} {1 - recall:>11.3f} "
+                f"{negatives_rejected:>12.3f} {rejected / total:>11.3f}")
+        if model_cost is not None:
+            saved = (rejected * model_cost - total * prefilter_cost) / total * 1000
+            line += f" {saved:>10.2f}"
+        print(line)
+
+if __name__ == "__main__":
+    main()
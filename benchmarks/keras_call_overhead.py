@@ -0,0 +1,60 @@
+"""Per-call overhead of Keras inference paths for single-image batches.
+
+    python -m benchmarks.keras_call_overhead --calls 200
+    python -m benchmarks.keras_call_overhead --model efficientdet_d0_ade20k.h5 --calls 50
+
+Times Model.predict, a plain Model.__call__, and CompiledModel with and without XLA on
+the same 1x512x512x3 input. The default model is a single pooling layer, so the numbers
+are almost pure framework overhead; --model measures the real EfficientDet weights.
+"""
+import argparse
+import time
+import numpy as np
+import tensorflow as tf
+from classification.keras_inference import CompiledModel
+
+def tiny_model(input_size):
+    inputs = tf.keras.Input(shape=(input_size, input_size, 3))
+    outputs = tf.keras.layers.GlobalAveragePooling2D()(inputs)
+    return tf.keras.Model(inputs, outputs)
+
+def time_calls(call, batch, calls):
+    call(batch)
+    start_time = time.perf_counter()
+    for _ in range(calls):
+        call(batch)
+    return (time.perf_counter() - start_time) / calls * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model')
+    parser.add_argument('--calls', type=int, default=100)
+    parser.add_argument('--input-size', type=int, default=512)
+    args = parser.parse_args()
+
+    model = tf.keras.models.load_model(args.model, compile=False) if args.model else tiny_model(args.input_size)
+    batch = np.random.rand(1, args.input_size, args.input_size, 3).astype(np.float32)
+    size = (args.input_size, args.input_size)
+    compiled = CompiledModel(model, size, jit_compile=False)
+    jitted = CompiledModel(model, size, jit_compile=True)
+
+    paths = [
+        ('Model.predict', lambda b: model.predict(b, verbose=0)),
+        ('Model.__call__', lambda b: model(b, training=False)),
+        ('CompiledModel', compiled),
+        ('CompiledModel (XLA)', jitted),
+    ]
+    baseline = None
+    print(f"{'path':<22} {'ms/call':>9} {'speedup':>8}")
+    for name, call in paths:
+        try:
+            ms = time_calls(call, batch, args.calls)
+        except Exception as e:
+            print(f"{name:<22} failed: {e}")
+            continue
+        baseline = baseline or ms
+        print(f"{name:<22} {ms:>9.3f} {baseline / ms:>7.1f}x")
+    print(f"\ntraces: compiled={compiled.trace_count()} xla={jitted.trace_count()} (1 each means no retracing)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""End-to-end HTTP load test of the API against a local Postgres with a fake detector.
+
+    python -m benchmarks.load_test --start-server --workers 2 --threads 4 --duration 60 \\
+        --concurrency 16 --mix start=1,status=4
+
+Point POSTGRES_* at a disposable local database; the server creates its tables there.
+With --start-server the harness launches gunicorn the way start_server.sh does, with
+FAKE_DETECTOR=1 so every category returns deterministic detections after
+--model-latency-ms, and stops it at the end. Without it, an already running server at
+--base-url is used (start it with FAKE_DETECTOR=1 to keep models out of the picture).
+
+Each client thread keeps one keep-alive connection and picks operations by the weights
+of --mix:
+    start   POST /process/start on one of --folders generated fixture folders
+    batch   POST /process/batch with --batch-size items
+    status  POST /process/status for a req_id returned by an earlier submission
+Reported per operation: requests/s, latency percentiles and error rate, plus Postgres
+connection counts sampled from pg_stat_activity and the server's scheduler metrics.
+Use --json to save the summary for comparing server configurations. Fixture folders
+are written to a temporary directory, or --fixture-dir, which the server must be able
+to read.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import deque
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def make_fixture_folders(directory, folders, images):
+    import cv2
+    import numpy as np
+    rng = np.random.RandomState(0)
+    paths = []
+    for folder_index in range(folders):
+        folder = os.path.join(directory, f"folder_{folder_index:03d}")
+        os.makedirs(folder)
+        for image_index in range(images):
+            img = rng.randint(0, 255, (240, 320, 3), dtype=np.uint8)
+            cv2.imwrite(os.path.join(folder, f"img_{folder_index:03d}_{image_index:04d}.jpg"), img)
+        paths.append(folder)
+    return paths
+
+def start_server(args):
+    server_env = dict(
+        os.environ,
+        WORKERS=str(args.workers),
+        THREADS=str(args.threads),
+        PORT=str(args.port),
+        PRELOAD_APP='1' if args.preload else '0',
+        LOG_LEVEL='warning',
+        FAKE_DETECTOR='1',
+        FAKE_DETECTOR_LATENCY_MS=str(args.model_latency_ms),
+    )
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'main:app'],
+        cwd=REPO_ROOT, env=server_env,
+    )
+
+class Client:
+    """One keep-alive HTTP connection, reopened after a failure."""
+
+    def __init__(self, base_url, timeout):
+        url = urllib.parse.urlparse(base_url)
+        self.host, self.port, self.prefix = url.hostname, url.port or 80, url.path.rstrip('/')
+        self.timeout = timeout
+        self.connection = None
+
+    def request(self, method, path, body=None):
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        payload = json.dumps(body) if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+        try:
+            self.connection.request(method, self.prefix + path, payload, headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except Exception:
+            self.connection.close()
+            self.connection = None
+            raise
+        try:
+            return response.status, json.loads(data)
+        except ValueError:
+            return response.status, None
+
+def wait_ready(base_url, timeout):
+    root = base_url.rsplit('/api/', 1)[0]
+    client = Client(root, timeout=5)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            status, _ = client.request('GET', '/health/ready')
+            if status == 200:
+                return
+        except Exception:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"Server at {root} was not ready after {timeout}s")
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, op, seconds, ok):
+        with self.lock:
+            self.latencies.setdefault(op, []).append(seconds)
+            if not ok:
+                self.errors[op] = self.errors.get(op, 0) + 1
+
+def sample_db_connections(stop, samples, interval):
+    import psycopg2
+    import data.env as env
+    connection = psycopg2.connect(
+        database=env.POSTGRES_DB, user=env.POSTGRES_USER, password=env.POSTGRES_PASSWORD,
+        host=env.POSTGRES_HOST, port=env.POSTGRES_PORT,
+    )
+    connection.autocommit = True
+    try:
+        while not stop.is_set():
+            with connection.cursor() as cur:
+                cur.execute(
+                    "SELECT COUNT(*), COUNT(*) FILTER (WHERE state = 'active') FROM pg_stat_activity "
+                    "WHERE datname = current_database() AND pid <> pg_backend_pid()"
+                )
+                samples.append(cur.fetchone())
+            stop.wait(interval)
+    finally:
+        connection.close()
+
+def run_client(args, folders, weights, deadline, recorder, req_ids, seed):
+    rng = random.Random(seed)
+    client = Client(args.base_url, args.request_timeout)
+    ops, op_weights = zip(*weights.items())
+    categories = args.categories.split(',')
+
+    def item():
+        return {
+            'r_id': f"load-{rng.randrange(args.tenants)}",
+            'abs_path': rng.choice(folders),
+            'category': rng.choice(categories),
+        }
+
+    while time.time() < deadline:
+        op = rng.choices(ops, op_weights)[0]
+        if op == 'status' and not req_ids:
+            op = 'start'
+        if op == 'start':
+            body = {**item(), 'wait': args.wait}
+            path = '/process/start'
+        elif op == 'batch':
+            body = {'items': [item() for _ in range(args.batch_size)], 'wait': args.wait}
+            path = '/process/batch'
+        else:
+            body = {'req_id': rng.choice(req_ids)}
+            path = '/process/status'
+
+        start_time = time.perf_counter()
+        try:
+            status, data = client.request('POST', path, body)
+            ok = status == 200 and (op == 'status' or bool(data and data.get('success')))
+        except Exception:
+            status, data, ok = None, None, False
+        recorder.record(op, time.perf_counter() - start_time, ok)
+
+        if data and op == 'start' and data.get('req_id'):
+            req_ids.append(data['req_id'])
+        elif data and op == 'batch':
+            req_ids.extend(result['req_id'] for result in data.get('results', []) if result.get('req_id'))
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def summarize(recorder, elapsed, db_samples, server_metrics):
+    operations = {}
+    for op, latencies in sorted(recorder.latencies.items()):
+        errors = recorder.errors.get(op, 0)
+        operations[op] = {
+            'requests': len(latencies),
+            'requests_per_second': len(latencies) / elapsed,
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p90_ms': percentile(latencies, 0.90) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'max_ms': max(latencies) * 1000,
+            'errors': errors,
+            'error_rate': errors / len(latencies),
+        }
+    total = sum(op['requests'] for op in operations.values())
+    errors = sum(op['errors'] for op in operations.values())
+    summary = {
+        'seconds': elapsed,
+        'requests': total,
+        'requests_per_second': total / elapsed,
+        'error_rate': errors / total if total else 0.0,
+        'operations': operations,
+        'db_connections': None,
+        'scheduler': server_metrics.get('scheduler') if server_metrics else None,
+    }
+    if db_samples:
+        summary['db_connections'] = {
+            'max_total': max(total for total, _ in db_samples),
+            'avg_total': sum(total for total, _ in db_samples) / len(db_samples),
+            'max_active': max(active for _, active in db_samples),
+            'avg_active': sum(active for _, active in db_samples) / len(db_samples),
+        }
+    return summary
+
+def print_summary(summary):
+    print(f"\n{summary['requests']} requests in {summary['seconds']:.1f}s: "
+          f"{summary['requests_per_second']:.1f} req/s, error rate {summary['error_rate']:.2%}")
+    print(f"{'operation':<10} {'requests':>8} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}")
+    for op, stats in summary['operations'].items():
+        print(f"{op:<10} {stats['requests']:>8} {stats['requests_per_second']:>8.1f} {stats['p50_ms']:>8.1f} "
+              f"{stats['p90_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f} {stats['error_rate']:>7.2%}")
+    if summary['db_connections']:
+        db = summary['db_connections']
+        print(f"postgres connections: max {db['max_total']} (avg {db['avg_total']:.1f}), "
+              f"active max {db['max_active']} (avg {db['avg_active']:.1f})")
+    if summary['scheduler']:
+        print(f"scheduler at end: queue_depth={summary['scheduler']['queue_depth']} running={summary['scheduler']['running']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default=None, help="defaults to http://127.0.0.1:<port>/api/v1")
+    parser.add_argument('--start-server', action='store_true')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--preload', action='store_true')
+    parser.add_argument('--model-latency-ms', type=float, default=20)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--mix', default='start=1,status=4')
+    parser.add_argument('--wait', action='store_true', help="submissions block until detection finishes")
+    parser.add_argument('--batch-size', type=int, default=5)
+    parser.add_argument('--folders', type=int, default=8)
+    parser.add_argument('--images', type=int, default=20, help="images per fixture folder")
+    parser.add_argument('--categories', default='animals,cars,food')
+    parser.add_argument('--tenants', type=int, default=4)
+    parser.add_argument('--request-timeout', type=float, default=120)
+    parser.add_argument('--db-sample-seconds', type=float, default=1.0)
+    parser.add_argument('--fixture-dir', help="where fixture folders are generated (default: a temp dir)")
+    parser.add_argument('--json')
+    args = parser.parse_args()
+    args.base_url = args.base_url or f"http://127.0.0.1:{args.port}/api/v1"
+    weights = {op: float(weight) for op, weight in (part.split('=') for part in args.mix.split(',') if part.strip())}
+
+    server = start_server(args) if args.start_server else None
+    try:
+        wait_ready(args.base_url, timeout=300)
+        with tempfile.TemporaryDirectory(dir=args.fixture_dir) as directory:
+            folders = make_fixture_folders(directory, args.folders, args.images)
+            recorder = Recorder()
+            req_ids = deque(maxlen=10000)
+            stop = threading.Event()
+            db_samples = []
+            sampler = threading.Thread(
+                target=sample_db_connections, args=(stop, db_samples, args.db_sample_seconds), daemon=True
+            )
+            sampler.start()
+
+            start_time = time.time()
+            deadline = start_time + args.duration
+            clients = [
+                threading.Thread(target=run_client, args=(args, folders, weights, deadline, recorder, req_ids, seed))
+                for seed in range(args.concurrency)
+            ]
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+            elapsed = time.time() - start_time
+            stop.set()
+
+            try:
+                _, server_metrics = Client(args.base_url, 10).request('GET', '/metrics')
+            except Exception:
+                server_metrics = None
+            summary = summarize(recorder, elapsed, db_samples, server_metrics)
+            summary['config'] = {key: value for key, value in vars(args).items() if key != 'json'}
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print_summary(summary)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+if __name__ == "__main__":
+    main()
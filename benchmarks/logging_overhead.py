@@ -0,0 +1,110 @@
+"""Per-call cost on the calling thread of print(flush=True) against logging.
+
+    python -m benchmarks.logging_overhead --messages 20000 --threads 4 > /dev/null
+
+Each variant writes the same per-image message from --threads threads to stdout:
+    print       print(..., flush=True), what the detectors used to do
+    sync        a logging.StreamHandler on stdout, formatted and written in the caller
+    queue       data/logger.py: JSON formatting and the write on the listener thread
+    queue+rate  the queue logger behind the per-image rate limit of LOG_IMAGE_RATE
+Latencies are what the calling (inference) thread pays; "drain" is how long the queue
+listener needed afterwards to catch up. Redirect stdout to a file, a pipe or /dev/null
+to compare sinks; the results table is written to stderr.
+"""
+import argparse
+import io
+import logging
+import sys
+import threading
+import time
+import data.env as env
+from data import logger as log_setup
+
+MESSAGE = "Found %d animals in img_%05d.jpg"
+
+def run_threads(threads, messages, call):
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(offset):
+        local = []
+        for index in range(offset, messages, threads):
+            start_time = time.perf_counter()
+            call(index)
+            local.append(time.perf_counter() - start_time)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(offset,)) for offset in range(threads)]
+    start_time = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return latencies, time.perf_counter() - start_time
+
+def reset_root():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(logging.INFO)
+    return root
+
+def bench_print(args):
+    return run_threads(args.threads, args.messages, lambda i: print(MESSAGE % (3, i), flush=True))
+
+def bench_sync(args):
+    root = reset_root()
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(log_setup.JsonFormatter())
+    root.addHandler(handler)
+    log = logging.getLogger('benchmarks.sync')
+    try:
+        return run_threads(args.threads, args.messages, lambda i: log.info(MESSAGE, 3, i))
+    finally:
+        root.removeHandler(handler)
+
+def bench_queue(args, logger_name):
+    reset_root()
+    log_setup._setup.reset()
+    log_setup.setup_logging()
+    log = logging.getLogger(logger_name)
+    token = log_setup.bind(req_id='bench', r_id='bench', category='animals')
+    try:
+        return run_threads(args.threads, args.messages, lambda i: log.info(MESSAGE, 3, i))
+    finally:
+        log_setup.unbind(token)
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    results = io.StringIO()
+    results.write(f"{'variant':<11} {'mean us':>8} {'p50 us':>8} {'p99 us':>8} {'max us':>9} {'drain ms':>9}\n")
+    variants = (
+        ('print', lambda: bench_print(args)),
+        ('sync', lambda: bench_sync(args)),
+        ('queue', lambda: bench_queue(args, 'benchmarks.queue')),
+        ('queue+rate', lambda: bench_queue(args, 'classification.images')),
+    )
+    for label, bench in variants:
+        latencies, _ = bench()
+        start_time = time.perf_counter()
+        log_setup.stop_logging()
+        drain = time.perf_counter() - start_time
+        results.write(
+            f"{label:<11} {sum(latencies) / len(latencies) * 1e6:>8.1f} {percentile(latencies, 0.5) * 1e6:>8.1f} "
+            f"{percentile(latencies, 0.99) * 1e6:>8.1f} {max(latencies) * 1e6:>9.1f} {drain * 1000:>9.1f}\n"
+        )
+    sys.stdout.flush()
+    sys.stderr.write(f"\n{args.messages} messages from {args.threads} threads, LOG_IMAGE_RATE={env.LOG_IMAGE_RATE}/s\n")
+    sys.stderr.write(results.getvalue())
+
+if __name__ == "__main__":
+    main()
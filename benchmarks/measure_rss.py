@@ -0,0 +1,100 @@
+"""Compare per-worker memory of the gunicorn server with and without preload_app.
+
+    python -m benchmarks.measure_rss --workers 4
+
+Starts the server twice (PRELOAD_APP=0, then 1), waits for /health/ready, and reports
+RSS, PSS and unique set size (private pages, USS) of every worker from
+/proc/<pid>/smaps_rollup. Weights shared copy-on-write show up as a drop in USS/PSS.
+Linux only; needs the usual POSTGRES_* environment.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import time
+import urllib.error
+import urllib.request
+
+def read_memory(pid):
+    """Return {'rss', 'pss', 'uss'} in KiB for a process."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(':'):
+                fields[parts[0][:-1]] = int(parts[1])
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'uss': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
+
+def child_pids(parent_pid):
+    pids = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces, so parse the fields after the closing paren.
+        ppid = int(stat[stat.rindex(')') + 2:].split()[1])
+        if ppid == parent_pid:
+            pids.append(int(entry))
+    return sorted(pids)
+
+def wait_until_ready(port, workers, timeout):
+    """Wait until enough consecutive readiness probes succeed that every worker has
+    most likely finished warming up."""
+    deadline = time.time() + timeout
+    consecutive = 0
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health/ready", timeout=5) as response:
+                consecutive = consecutive + 1 if response.status == 200 else 0
+        except (urllib.error.URLError, ConnectionError, OSError):
+            consecutive = 0
+        if consecutive >= workers * 3:
+            return True
+        time.sleep(0.5)
+    return False
+
+def measure(preload, workers, port, timeout, settle):
+    server_env = dict(os.environ, WORKERS=str(workers), PORT=str(port), PRELOAD_APP='1' if preload else '0', LOG_LEVEL='warning')
+    master = subprocess.Popen(['gunicorn', '-c', 'gunicorn.conf.py', 'main:app'], env=server_env)
+    try:
+        if not wait_until_ready(port, workers, timeout):
+            raise RuntimeError(f"Server did not become ready within {timeout} seconds (preload={preload})")
+        time.sleep(settle)
+        return read_memory(master.pid), {pid: read_memory(pid) for pid in child_pids(master.pid)}
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=60)
+
+def print_report(preload, master_memory, worker_memory):
+    print(f"\npreload_app={preload}")
+    print(f"{'pid':>8} {'RSS MiB':>10} {'PSS MiB':>10} {'USS MiB':>10}")
+    print(f"{'master':>8} {master_memory['rss'] / 1024:>10.1f} {master_memory['pss'] / 1024:>10.1f} {master_memory['uss'] / 1024:>10.1f}")
+    for pid, memory in worker_memory.items():
+        print(f"{pid:>8} {memory['rss'] / 1024:>10.1f} {memory['pss'] / 1024:>10.1f} {memory['uss'] / 1024:>10.1f}")
+    if worker_memory:
+        avg_uss = sum(m['uss'] for m in worker_memory.values()) / len(worker_memory) / 1024
+        total_pss = (master_memory['pss'] + sum(m['pss'] for m in worker_memory.values())) / 1024
+        print(f"Average worker USS: {avg_uss:.1f} MiB, total PSS: {total_pss:.1f} MiB")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=8123)
+    parser.add_argument('--timeout', type=int, default=600, help="seconds to wait for readiness")
+    parser.add_argument('--settle', type=float, default=5.0, help="seconds to wait after readiness before sampling")
+    args = parser.parse_args()
+
+    for preload in (False, True):
+        master_memory, worker_memory = measure(preload, args.workers, args.port, args.timeout, args.settle)
+        print_report(preload, master_memory, worker_memory)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Search for the best thread split for a category mix on this node.
+
+    python -m benchmarks.thread_budget_search --folder /data/sample --categories animals,cars --workers 4
+
+For every candidate (decode threads, framework threads) split, WORKERS processes run the
+category mix over the folder concurrently, the way gunicorn workers would, and the
+aggregate images/second is reported. The best split can be pinned with the printed
+DECODE_THREADS / TORCH_THREADS / TF_INTRA_OP_THREADS environment variables.
+"""
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+
+def run_worker(folder, categories, max_images):
+    """Benchmark body executed inside each spawned worker process."""
+    from classification.sources import ReadFailure, iter_decoded, list_images
+    from classification.registry import detect_image, get_detector
+    from classification.thread_budget import apply_thread_budget
+
+    budget = apply_thread_budget()
+    detectors = {category: get_detector(category) for category in categories}
+    image_paths = list_images(folder, max_images)
+
+    start_time = time.time()
+    for image_path, img in zip(image_paths, iter_decoded(image_paths, budget['decode_threads'])):
+        if isinstance(img, ReadFailure):
+            continue
+        for category in categories:
+            detect_image(category, detectors[category], image_path, img=img)
+    elapsed = time.time() - start_time
+    print(json.dumps({'images': len(image_paths), 'seconds': elapsed}))
+
+def candidate_splits(per_worker):
+    decode_options = sorted({1, 2, max(1, per_worker // 4), max(1, per_worker // 2)})
+    compute_options = sorted({1, max(1, per_worker // 2), per_worker, max(1, per_worker - 1)})
+    for decode, compute in itertools.product(decode_options, compute_options):
+        if decode + compute <= per_worker + 1:
+            yield decode, compute
+
+def run_split(args, decode, compute):
+    split_env = dict(
+        os.environ,
+        WORKERS=str(args.workers),
+        DECODE_THREADS=str(decode),
+        TORCH_THREADS=str(compute),
+        TF_INTRA_OP_THREADS=str(compute),
+        OMP_NUM_THREADS=str(compute),
+    )
+    command = [
+        sys.executable, '-m', 'benchmarks.thread_budget_search', '--run-worker',
+        '--folder', args.folder, '--categories', args.categories, '--max-images', str(args.max_images),
+    ]
+    start_time = time.time()
+    workers = [subprocess.Popen(command, env=split_env, stdout=subprocess.PIPE, text=True) for _ in range(args.workers)]
+    images = 0
+    for worker in workers:
+        output, _ = worker.communicate()
+        if worker.returncode != 0:
+            raise RuntimeError(f"Benchmark worker failed for decode={decode}, compute={compute}")
+        images += json.loads(output.strip().splitlines()[-1])['images']
+    return images / (time.time() - start_time)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--folder', required=True)
+    parser.add_argument('--categories', default='animals')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--max-images', type=int, default=50)
+    parser.add_argument('--run-worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    categories = [c.strip() for c in args.categories.split(',') if c.strip()]
+
+    if args.run_worker:
+        run_worker(args.folder, categories, args.max_images)
+        return
+
+    from classification.thread_budget import available_cores
+    per_worker = max(1, available_cores() // args.workers)
+    results = []
+    for decode, compute in candidate_splits(per_worker):
+        throughput = run_split(args, decode, compute)
+        results.append((throughput, decode, compute))
+        print(f"decode={decode:<3} compute={compute:<3} {throughput:.2f} images/s", flush=True)
+
+    best = max(results)
+    print(f"\nBest split for {args.workers} workers x {categories}: {best[0]:.2f} images/s")
+    print(f"DECODE_THREADS={best[1]} TORCH_THREADS={best[2]} TF_INTRA_OP_THREADS={best[2]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Latency of a YOLO category with filtering after the model call against inside it.
+
+    python -m benchmarks.yolo_filtering --folder /data/val2017 --category cars --mosaic 3
+
+Crowded scenes are built by tiling --mosaic x --mosaic images of the folder into one
+image, so NMS and box materialization see many objects of every COCO class. Each
+variant runs over the same mosaics after --warmup untimed calls:
+    post     detector(img), then class and confidence filtering in Python (the old path)
+    pushed   detector(img, classes=..., conf=...), yolo_filters.predict_args
+    pushed+  the same with --iou and --max-det
+Reported per variant: ms per image, boxes returned by the model and detections kept,
+which must match between post and pushed.
+"""
+import argparse
+import time
+import cv2
+import numpy as np
+from classification.registry import CATEGORIES
+from classification.sources import list_images
+from classification.yolo_filters import predict_args
+
+def build_mosaics(image_paths, mosaic, size):
+    """Tile mosaic x mosaic images into size x size scenes."""
+    cell = size // mosaic
+    images = [cv2.resize(img, (cell, cell)) for img in (cv2.imread(path) for path in image_paths) if img is not None]
+    per_scene = mosaic * mosaic
+    scenes = []
+    for start in range(0, len(images) - per_scene + 1, per_scene):
+        rows = [np.hstack(images[start + row * mosaic:start + (row + 1) * mosaic]) for row in range(mosaic)]
+        scenes.append(np.vstack(rows))
+    return scenes
+
+CLASS_MAPS = {'animals': 'ANIMAL_CLASSES', 'cars': 'CAR_CLASSES', 'food': 'FOOD_CLASSES'}
+
+def class_map(category, detector):
+    module = CATEGORIES[category]['module']
+    if category == 'plants':
+        return module.plant_classes(detector)
+    return getattr(module, CLASS_MAPS[category])
+
+def run(detector, scenes, wanted, confidence_threshold, predict):
+    returned = kept = 0
+    start_time = time.perf_counter()
+    for img in scenes:
+        for result in detector(img, **predict):
+            for box in result.boxes:
+                returned += 1
+                class_id = int(box.cls.item())
+                if class_id in wanted and box.conf.item() > confidence_threshold:
+                    box.xywh[0].tolist()
+                    kept += 1
+    return (time.perf_counter() - start_time) / len(scenes) * 1000, returned, kept
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--folder', required=True)
+    parser.add_argument('--category', default='cars', choices=[c for c, s in CATEGORIES.items() if s['backend'] == 'yolo'])
+    parser.add_argument('--mosaic', type=int, default=3)
+    parser.add_argument('--size', type=int, default=1280)
+    parser.add_argument('--scenes', type=int, default=20)
+    parser.add_argument('--confidence', type=float, default=0.5)
+    parser.add_argument('--iou', type=float, default=0.5)
+    parser.add_argument('--max-det', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=3)
+    args = parser.parse_args()
+
+    image_paths = list_images(args.folder, args.scenes * args.mosaic * args.mosaic)
+    scenes = build_mosaics(image_paths, args.mosaic, args.size)
+    if not scenes:
+        raise SystemExit(f"Not enough images in {args.folder} for one {args.mosaic}x{args.mosaic} mosaic")
+
+    detector = CATEGORIES[args.category]['module'].initialize_detector()
+    wanted = class_map(args.category, detector)
+    variants = (
+        ('post', {'verbose': False}),
+        ('pushed', predict_args(wanted, args.confidence)),
+        ('pushed+', predict_args(wanted, args.confidence, args.iou, args.max_det)),
+    )
+    for _ in range(args.warmup):
+        detector(scenes[0], verbose=False)
+
+    baseline = None
+    print(f"{len(scenes)} scenes of {args.mosaic}x{args.mosaic} images at {args.size}px, category {args.category}")
+    print(f"{'variant':<8} {'ms/img':>8} {'returned':>9} {'kept':>6} {'speedup':>8}")
+    for label, predict in variants:
+        ms, returned, kept = run(detector, scenes, wanted, args.confidence, predict)
+        baseline = baseline or ms
+        print(f"{label:<8} {ms:>8.1f} {returned:>9} {kept:>6} {baseline / ms:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
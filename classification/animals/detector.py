@@ -1,7 +1,12 @@
+import logging
 import cv2
-import os
 from ultralytics import YOLO
-import time
+import data.env as env
+from classification.tiling import detect_tiled
+from classification.yolo_filters import predict_args, select_classes
+
+logger = logging.getLogger(__name__)
+image_logger = logging.getLogger('classification.images')
 
 ANIMAL_CLASSES = {
     15: "bird", 16: "cat", 17: "dog", 18: "horse", 19: "sheep",
@@ -10,26 +15,40 @@ ANIMAL_CLASSES = {
 
 def initialize_detector(model_path="yolov8n.pt"):
     try:
-        print("Initializing YOLOv8 Nano detector for animals (COCO)...")
+        logger.info(f"Initializing YOLOv8 detector {model_path} for animals (COCO)...")
         detector = YOLO(model_path)
-        print("YOLOv8 Nano detector initialized successfully!")
+        logger.info("YOLOv8 detector initialized successfully!")
         return detector
     except Exception as e:
-        print(f"Error initializing YOLOv8 detector: {e}")
+        logger.error(f"Error initializing YOLOv8 detector: {e}")
         return None
 
-def detect_animals_single(detector, image_path, confidence_threshold=0.5):
+def detect_animals_single(detector, image_path, confidence_threshold=0.5, img=None, tiled=False,
+                          classes=None, iou=None, max_det=None, imgsz=None):
     if detector is None:
-        print("Detector not initialized!")
+        logger.warning("Detector not initialized!")
         return []
 
     try:
-        img = cv2.imread(image_path)
         if img is None:
-            print(f"Error loading image {image_path}")
+            img = cv2.imread(image_path)
+        if img is None:
+            image_logger.warning(f"Error loading image {image_path}")
+            return []
+
+        wanted = select_classes(ANIMAL_CLASSES, classes)
+        if not wanted:
             return []
+        predict = predict_args(wanted, confidence_threshold, iou, max_det, imgsz)
 
-        results = detector(img)
+        if tiled and max(img.shape[:2]) > env.TILE_SIZE:
+            return [
+                (wanted[class_id], xywh, confidence)
+                for class_id, xywh, confidence in detect_tiled(detector, img, **predict)
+                if class_id in wanted and confidence > confidence_threshold
+            ]
+
+        results = detector(img, **predict)
         detected = []
 
         for result in results:
@@ -37,74 +56,10 @@ def detect_animals_single(detector, image_path, confidence_threshold=0.5):
                 x, y, w, h = map(int, box.xywh[0])
                 confidence = box.conf.item()
                 class_id = int(box.cls.item())
-                if class_id in ANIMAL_CLASSES and confidence > confidence_threshold:
-                    label = ANIMAL_CLASSES[class_id]
+                if class_id in wanted and confidence > confidence_threshold:
+                    label = wanted[class_id]
                     detected.append((label, (x, y, w, h), confidence))
         return detected
     except Exception as e:
-        print(f"Error detecting animals in {image_path}: {e}")
+        image_logger.warning(f"Error detecting animals in {image_path}: {e}")
         return []
-
-def process_images(input_folder, output_folder=None, confidence_threshold=0.5, max_images=50):
-    if not os.path.exists(input_folder):
-        print(f"Error: Input folder '{input_folder}' not found!")
-        return [], {'detected': 0, 'processed': 0, 'errors': 0, 'detections': {}}
-
-    if output_folder:
-        os.makedirs(output_folder, exist_ok=True)
-
-    image_files = [
-        os.path.join(input_folder, f) for f in os.listdir(input_folder)
-        if os.path.splitext(f.lower())[1] in {'.jpg', '.jpeg', '.png'}
-    ][:max_images]
-
-    if not image_files:
-        print("No valid images found.")
-        return [], {'detected': 0, 'processed': 0, 'errors': 0, 'detections': {}}
-
-    detector = initialize_detector()
-    if not detector:
-        return [], {'detected': 0, 'processed': 0, 'errors': 0, 'detections': {}}
-
-    print("\nStarting animal detection with COCO...")
-    start_time = time.time()
-    stats = {'detected': 0, 'processed': 0, 'errors': 0, 'detections': {}}
-    images_with_objects = []
-
-    for image_path in image_files:
-        try:
-            detections = detect_animals_single(detector, image_path, confidence_threshold)
-            stats['processed'] += 1
-            if detections:
-                images_with_objects.append(image_path)
-                stats['detected'] += len(detections)
-                stats['detections'][image_path] = detections
-                print(f"Found {len(detections)} animals in {os.path.basename(image_path)}")
-
-                if output_folder:
-                    img = cv2.imread(image_path)
-                    for label, (x, y, w, h), _ in detections:
-                        cv2.rectangle(img, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                        cv2.putText(img, label, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
-                    output_path = os.path.join(output_folder, os.path.basename(image_path))
-                    cv2.imwrite(output_path, img)
-        except Exception as e:
-            print(f"Error processing {image_path}: {e}")
-            stats['errors'] += 1
-
-    print_summary(start_time, stats, images_with_objects)
-    return images_with_objects, stats
-
-def print_summary(start_time, stats, images_with_objects):
-    elapsed_time = time.time() - start_time
-    avg_time_per_image = elapsed_time / stats['processed'] if stats['processed'] > 0 else 0
-    images_per_second = stats['processed'] / elapsed_time if elapsed_time > 0 else 0
-    percentage_detected = (len(images_with_objects) / stats['processed'] * 100) if stats['processed'] > 0 else 0
-
-    print("\nAnimal Detection Complete!")
-    print(f"Total processing time: {elapsed_time:.2f} seconds")
-    print(f"Average time per image: {avg_time_per_image:.2f} seconds")
-    print(f"Images per second: {images_per_second:.2f}")
-    print(f"Total images processed: {stats['processed']}")
-    print(f"Total animals detected: {stats['detected']}")
-    print(f"Images with animals: {len(images_with_objects)} ({percentage_detected:.1f}%)")
\ No newline at end of file
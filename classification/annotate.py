@@ -0,0 +1,107 @@
+import os
+import threading
+from collections import OrderedDict
+import cv2
+import data.env as env
+from classification.sources import read_image
+from database.postgres import get_connection
+from database.queries import resolve_req_id
+from data.table_names import TableNames
+
+class RenderCache:
+    """LRU cache of rendered JPEG bytes, bounded by the total size of the cached images."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def set(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+annotation_cache = RenderCache(env.ANNOTATION_CACHE_BYTES)
+
+def draw_detections(img, detections):
+    for label, (x, y, w, h), _ in detections:
+        cv2.rectangle(img, (x, y), (x + w, y + h), (0, 255, 0), 2)
+        cv2.putText(img, label, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+    return img
+
+def fetch_detections(req_id, image):
+    """Return (image_path, detections) for an image of a request, matched either by its
+    stored path or by its basename."""
+    postgres = get_connection()
+    basename = "/" + os.path.basename(image)
+    with postgres, postgres.cursor() as cur:
+        cur.execute(
+            f"SELECT image_path, object_label, bbox_x, bbox_y, bbox_w, bbox_h, confidence "
+            f"FROM {TableNames.DETECTED_OBJECTS.value} "
+            "WHERE req_id = %s AND (image_path = %s OR right(image_path, %s) = %s) AND bbox_x IS NOT NULL "
+            "ORDER BY id",
+            (req_id, image, len(basename), basename)
+        )
+        rows = cur.fetchall()
+
+    if not rows:
+        return None, []
+    exact = [row for row in rows if row[0] == image]
+    rows = exact or [row for row in rows if row[0] == rows[0][0]]
+    return rows[0][0], [(label, (x, y, w, h), confidence) for _, label, x, y, w, h, confidence in rows]
+
+def render_annotated(req_id, image):
+    """Return JPEG bytes of an image with the request's stored boxes drawn on it,
+    or None when the request has no detections for that image. Renders are cached by
+    the number of boxes as well, so a request that is still running never serves a
+    render from before its latest checkpoint."""
+    req_id = resolve_req_id(req_id)
+    image_path, detections = fetch_detections(req_id, image)
+    if not detections:
+        return None
+    key = (req_id, image_path, len(detections))
+    data = annotation_cache.get(key)
+    if data is not None:
+        return data
+
+    img = read_image(image_path)
+    if img is None:
+        raise FileNotFoundError(f"Source image {image_path} could not be read.")
+
+    ok, encoded = cv2.imencode('.jpg', draw_detections(img, detections))
+    if not ok:
+        raise ValueError(f"Failed to encode annotated image for {image_path}")
+    data = encoded.tobytes()
+    annotation_cache.set(key, data)
+    return data
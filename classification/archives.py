@@ -0,0 +1,91 @@
+import os
+import tarfile
+import threading
+import zipfile
+from collections import OrderedDict
+
+ARCHIVE_EXTENSIONS = ('.zip', '.tar')
+COMPRESSED_TAR_EXTENSIONS = ('.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+# Archive members are addressed as "<archive path>!/<member name>" wherever an image path is expected.
+MEMBER_MARKER = '!/'
+MAX_OPEN_ARCHIVES = 8
+
+def is_archive(path):
+    lower = path.lower()
+    return lower.endswith(ARCHIVE_EXTENSIONS) or lower.endswith(COMPRESSED_TAR_EXTENSIONS)
+
+def member_path(archive_path, member):
+    return f"{archive_path}{MEMBER_MARKER}{member}"
+
+def split_member_path(path):
+    """Return (archive_path, member) for an archive member path, or (path, None)."""
+    archive_path, marker, member = path.partition(MEMBER_MARKER)
+    if marker and member and is_archive(archive_path):
+        return archive_path, member
+    return path, None
+
+class ZipArchive:
+    def __init__(self, path):
+        # ZipFile serializes reads of its shared file handle internally, so decode
+        # threads can read different members of one open archive.
+        self._zip = zipfile.ZipFile(path)
+
+    def names(self):
+        return [info.filename for info in self._zip.infolist() if not info.is_dir()]
+
+    def read(self, member):
+        return self._zip.read(member)
+
+class TarArchive:
+    def __init__(self, path):
+        """Index the data offset of every regular member once; reads are then a single
+        positioned read each, with no shared file position between threads."""
+        try:
+            with tarfile.open(path, 'r:') as tar:
+                self._members = {
+                    member.name: (member.offset_data, member.size)
+                    for member in tar.getmembers() if member.isfile() and not member.issparse()
+                }
+        except tarfile.ReadError as e:
+            raise ValueError(f"{path} is not an uncompressed tar archive: {e}")
+        self._file = open(path, 'rb')
+
+    def names(self):
+        return list(self._members)
+
+    def read(self, member):
+        offset, size = self._members[member]
+        return os.pread(self._file.fileno(), size, offset)
+
+_archives = OrderedDict()
+_archives_lock = threading.Lock()
+
+def open_archive(path):
+    """Return a shared, indexed handle for an archive, reopened when the file changes.
+    Evicted handles are closed by garbage collection once no reader still holds them."""
+    if path.lower().endswith(COMPRESSED_TAR_EXTENSIONS):
+        raise ValueError(f"Compressed tar archives cannot be read member by member: {path}. Use .tar or .zip.")
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _archives_lock:
+        archive = _archives.get(key)
+        if archive is not None:
+            _archives.move_to_end(key)
+            return archive
+
+    archive = ZipArchive(path) if path.lower().endswith('.zip') else TarArchive(path)
+    with _archives_lock:
+        _archives[key] = archive
+        while len(_archives) > MAX_OPEN_ARCHIVES:
+            _archives.popitem(last=False)
+    return archive
+
+def list_members(archive_path, extensions):
+    """Sorted member names of an archive with one of the given extensions."""
+    return sorted(
+        name for name in open_archive(archive_path).names()
+        if os.path.splitext(name.lower())[1] in extensions
+    )
+
+def read_member(archive_path, member):
+    return open_archive(archive_path).read(member)
@@ -0,0 +1,62 @@
+import threading
+import time
+import data.env as env
+from storage.backends import get_storage
+
+def coalesce_key(item):
+    """Submissions only coalesce within one tenant: an attached request learns the
+    primary's req_id, which must not let another r_id cancel or read its job."""
+    options = item.get('options') or {}
+    return (
+        item['r_id'], get_storage(item['abs_path']).canonical(item['abs_path']), item['category'],
+        tuple(sorted(options.items())),
+    )
+
+class InflightRegistry:
+    """Tracks running jobs by (r_id, abs_path, category, options) so identical submissions
+    made while a job runs, or within window seconds after it finished, attach to it
+    instead of running the folder again. Shared by all threads of the worker process."""
+
+    def __init__(self, window):
+        self.window = window
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def _expire(self, now):
+        expired = [key for key, (_, expires_at) in self._jobs.items() if expires_at is not None and expires_at <= now]
+        for key in expired:
+            del self._jobs[key]
+
+    def claim(self, key, job):
+        """Register job as the primary for key and return None, or return the primary
+        job that an identical submission should attach to."""
+        with self._lock:
+            self._expire(time.monotonic())
+            entry = self._jobs.get(key)
+            if entry is not None:
+                self.coalesced += 1
+                return entry[0]
+            self._jobs[key] = (job, None)
+            job['coalesce_key'] = key
+            return None
+
+    def release(self, job):
+        """Start the dedupe window of a finished primary job."""
+        with self._lock:
+            key = job.get('coalesce_key')
+            if key in self._jobs and self._jobs[key][0] is job:
+                self._jobs[key] = (job, time.monotonic() + self.window)
+
+    def forget(self, job):
+        with self._lock:
+            key = job.get('coalesce_key')
+            if key in self._jobs and self._jobs[key][0] is job:
+                del self._jobs[key]
+
+    def metrics(self):
+        with self._lock:
+            running = sum(1 for _, expires_at in self._jobs.values() if expires_at is None)
+            return {'inflight': running, 'recent': len(self._jobs) - running, 'coalesced': self.coalesced}
+
+inflight = InflightRegistry(env.COALESCE_WINDOW_SECONDS)
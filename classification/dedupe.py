@@ -0,0 +1,74 @@
+import cv2
+import data.env as env
+
+def dhash(img, size=8):
+    """64-bit difference hash: each bit says whether a pixel of a (size+1)x(size) grayscale
+    thumbnail is brighter than its right neighbour. Burst frames of the same scene land
+    within a few bits of each other."""
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    thumb = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    value = 0
+    for bit in (thumb[:, 1:] > thumb[:, :-1]).flatten():
+        value = (value << 1) | int(bit)
+    return value
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+class BKTree:
+    """Burkhard-Keller tree over hashes under Hamming distance. A radius search only
+    descends into children whose edge distance is within the radius of the query's
+    distance to the node, so lookups touch a small part of the tree."""
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, key, value):
+        self.size += 1
+        if self.root is None:
+            self.root = (key, value, {})
+            return
+        node = self.root
+        while True:
+            distance = hamming(key, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (key, value, {})
+                return
+            node = child
+
+    def nearest(self, key, max_distance):
+        """Return (distance, value) of the closest entry within max_distance, or None."""
+        best = None
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node_key, value, children = stack.pop()
+            distance = hamming(key, node_key)
+            if distance <= max_distance and (best is None or distance < best[0]):
+                best = (distance, value)
+                if distance == 0:
+                    break
+            radius = best[0] if best is not None else max_distance
+            for edge, child in children.items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        return best
+
+class DuplicateIndex:
+    """Detections of already inferred images, keyed by the category and detection
+    options they were produced with, looked up by perceptual hash."""
+
+    def __init__(self, max_distance=None):
+        self.max_distance = env.DEDUPE_MAX_DISTANCE if max_distance is None else max_distance
+        self._trees = {}
+
+    def find(self, key, image_hash):
+        tree = self._trees.get(key)
+        if tree is None:
+            return None
+        match = tree.nearest(image_hash, self.max_distance)
+        return None if match is None else match[1]
+
+    def add(self, key, image_hash, detections):
+        self._trees.setdefault(key, BKTree()).add(image_hash, detections)
@@ -0,0 +1,31 @@
+import hashlib
+import os
+import time
+import data.env as env
+
+LABELS = ["giraffe", "zebra", "car", "pizza", "tree", "mountain", "sea"]
+
+class FakeDetector:
+    """Stand-in for a loaded model, used by load tests (FAKE_DETECTOR=1)."""
+
+    def __init__(self, latency_seconds):
+        self.latency_seconds = latency_seconds
+
+def initialize_detector():
+    return FakeDetector(env.FAKE_DETECTOR_LATENCY_MS / 1000)
+
+def detect_single(detector, image_path, confidence_threshold=0.5, img=None, **options):
+    """Deterministic detections derived from the image's file name, after sleeping for
+    the configured model latency. Roughly one image in four has no detections."""
+    time.sleep(detector.latency_seconds)
+    digest = hashlib.sha1(os.path.basename(image_path).encode()).digest()
+    if digest[0] < 64:
+        return []
+    height, width = img.shape[:2] if img is not None else (480, 640)
+    detections = []
+    for i in range(1 + digest[1] % 3):
+        x, y = digest[2 + i] * width // 512, digest[5 + i] * height // 512
+        confidence = 0.5 + digest[8 + i] / 512
+        if confidence > confidence_threshold:
+            detections.append((LABELS[digest[11 + i] % len(LABELS)], (x, y, width // 4, height // 4), confidence))
+    return detections
@@ -0,0 +1,27 @@
+import tensorflow as tf
+import data.env as env
+
+class CompiledModel:
+    """A Keras model behind a tf.function with a fixed input signature. Calling it runs
+    the traced graph directly, without the data adapter and callback setup that
+    Model.predict repeats on every call. The batch dimension is left open, so batch
+    sizes share one trace; with jit_compile XLA still compiles once per batch size."""
+
+    def __init__(self, model, input_size=(512, 512), jit_compile=None):
+        self.model = model
+        self.input_size = input_size
+        self.jit_compile = env.TF_JIT_COMPILE if jit_compile is None else jit_compile
+        signature = [tf.TensorSpec(shape=(None, input_size[0], input_size[1], 3), dtype=tf.float32)]
+
+        @tf.function(input_signature=signature, jit_compile=self.jit_compile)
+        def infer(batch):
+            return model(batch, training=False)
+
+        self._infer = infer
+
+    def __call__(self, batch):
+        outputs = self._infer(tf.convert_to_tensor(batch, dtype=tf.float32))
+        return tf.nest.map_structure(lambda tensor: tensor.numpy(), outputs)
+
+    def trace_count(self):
+        return self._infer.experimental_get_tracing_count()
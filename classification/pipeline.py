@@ -0,0 +1,649 @@
+import logging
+import os
+import uuid
+import asyncio
+import threading
+import time
+from collections import Counter, deque
+from itertools import islice
+from psycopg2.extras import Json, execute_values
+from classification.coalescing import coalesce_key, inflight
+from classification.dedupe import DuplicateIndex, dhash
+from classification.profiling import new_profiler, profiling_mode, save_profile
+from classification.registry import CATEGORIES, get_detector, detect_image
+from classification.scheduler import PRIORITY_BULK, PRIORITY_INTERACTIVE, scheduler
+from classification.sources import ReadFailure, frame_path, is_video, iter_decoded, list_images, sample_frames
+from storage.backends import get_storage
+import data.env as env
+from data.err_msgs import ErrorMessages
+from data.logger import bind, unbind
+from data.per_process import PerProcess
+from database.postgres import get_connection
+from database.status_cache import status_cache
+from data.table_names import TableNames
+
+logger = logging.getLogger(__name__)
+image_logger = logging.getLogger('classification.images')
+
+# How often a video stream being sampled looks for cancellations made through another
+# worker process; local cancellations and timeouts are seen on every frame.
+STREAM_POLL_SECONDS = 1.0
+
+# Jobs queued or running in this process, by req_id, so they can be cancelled and
+# their heartbeat kept fresh.
+active_jobs = {}
+_active_lock = threading.Lock()
+
+def log_context(job):
+    return {'req_id': job['req_id'], 'r_id': job['r_id'], 'category': job['category']}
+
+def new_req_id():
+    return "rqid-" + str(uuid.uuid4())
+
+def new_stats():
+    # 'detections', 'frames' and 'progress' only hold what has not been checkpointed yet.
+    return {
+        'detected': 0, 'processed': 0, 'errors': 0, 'images_with_objects': 0, 'skipped_duplicates': 0,
+        'detections': {}, 'frames': {}, 'progress': [],
+    }
+
+def create_job(item, req_id=None):
+    """Build the in-memory job record of a {r_id, abs_path, category, options} item."""
+    options = item.get('options') or {}
+    if options.get('classes') is not None:
+        # Options key the coalescing and inference caches, so they must stay hashable
+        # after a round trip through JSON (recovered jobs).
+        options = {**options, 'classes': tuple(options['classes'])}
+    if not options.get('tier'):
+        # Requests from before quality tiers ran what is now the default tier.
+        options = {**options, 'tier': env.DEFAULT_QUALITY_TIER}
+    supported = CATEGORIES[item['category']]['options']
+    return {
+        'req_id': req_id or new_req_id(),
+        'r_id': item['r_id'],
+        'abs_path': item['abs_path'],
+        'category': item['category'],
+        'options': options,
+        'detect_options': {key: value for key, value in options.items() if key in supported},
+        'error': None,
+        'stats': new_stats(),
+        'completed_images': set(),
+        'aliases': [],
+        'stop_reason': None,
+        'deadline': time.monotonic() + options['deadline_seconds'] if options.get('deadline_seconds') else None,
+        'result': None,
+        'done': threading.Event(),
+    }
+
+def insert_requests(postgres, jobs, aliases=()):
+    """Create the detection_request rows of all jobs, and of submissions coalesced into
+    them, in a single statement."""
+    rows = [
+        (job['req_id'], job['r_id'], job['category'], 'queued', None, job['abs_path'], Json(job['options']),
+         job['options']['tier'])
+        for job in jobs
+    ]
+    rows += [
+        (alias['req_id'], alias['r_id'], alias['category'], 'coalesced', alias['primary']['req_id'],
+         alias['primary']['abs_path'], Json(alias['primary']['options']), alias['primary']['options']['tier'])
+        for alias in aliases
+    ]
+    with postgres.cursor() as cur:
+        execute_values(
+            cur,
+            f"INSERT INTO {TableNames.DETECTION_REQUEST.value} "
+            "(req_id, r_id, category, status, coalesced_into, abs_path, options, tier, heartbeat_at) VALUES %s",
+            rows,
+            template="(%s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)"
+        )
+        postgres.commit()
+    for job in jobs:
+        status_cache.set(job['req_id'], 'queued')
+
+def set_status(postgres, req_id, status):
+    """Update a request's status and write it through to the in-process status cache."""
+    with postgres.cursor() as cur:
+        cur.execute(
+            f"UPDATE {TableNames.DETECTION_REQUEST.value} SET status = %s WHERE req_id = %s",
+            (status, req_id)
+        )
+        postgres.commit()
+    status_cache.set(req_id, status)
+
+def set_job_status(postgres, job, status):
+    """Set a job's status; requests coalesced into it report the same status."""
+    set_status(postgres, job['req_id'], status)
+    for alias_req_id in job['aliases']:
+        status_cache.set(alias_req_id, status)
+
+def stop_reason(job):
+    """Return 'cancelled' or 'timed_out' once a job must stop, checked between images."""
+    if job['stop_reason'] is None and job['deadline'] is not None and time.monotonic() > job['deadline']:
+        job['stop_reason'] = 'timed_out'
+    return job['stop_reason']
+
+def detect_entries(entries, detectors, duplicates=None, images=None):
+    """Run detection over (real_path, [(job, image_path), ...]) entries. Every image is
+    decoded once no matter how many jobs reference it, and each (image, category,
+    options) combination is inferred once. For jobs with the dedupe option, an image
+    whose perceptual hash is close to an already inferred one in duplicates reuses
+    that image's detections instead of running the model. images holds already decoded
+    images for the entries, such as video frames; files are decoded otherwise."""
+    if images is None:
+        images = iter_decoded([real_path for real_path, _ in entries])
+    for (_, image_consumers), img in zip(entries, images):
+        if isinstance(img, ReadFailure):
+            for job, image_path in image_consumers:
+                if stop_reason(job):
+                    continue
+                image_logger.warning(f"Error reading {image_path}: {img.error}", extra=log_context(job))
+                job['stats']['errors'] += 1
+                job['stats']['progress'].append(image_path)
+            continue
+        # Inferred detections are shared by every job with the same key; detections
+        # borrowed from a near-duplicate only by the jobs that opted into dedupe.
+        results = {}
+        reused = {}
+        image_hash = None
+        if duplicates is not None and img is not None and any(job['options'].get('dedupe') for job, _ in image_consumers):
+            image_hash = dhash(img)
+        for job, image_path in image_consumers:
+            category = job['category']
+            detector = detectors.get((category, job['options']['tier']))
+            if detector is None or stop_reason(job):
+                continue
+
+            stats = job['stats']
+            key = (category, tuple(sorted(job['detect_options'].items())))
+            try:
+                detections = results.get(key)
+                if detections is None and image_hash is not None and job['options'].get('dedupe'):
+                    if key not in reused:
+                        reused[key] = duplicates.find(key, image_hash)
+                    detections = reused[key]
+                    if detections is not None:
+                        stats['skipped_duplicates'] += 1
+                if detections is None:
+                    results[key] = detect_image(category, detector, image_path, img=img, **job['detect_options'])
+                    if image_hash is not None:
+                        duplicates.add(key, image_hash, results[key])
+                    detections = results[key]
+                stats['processed'] += 1
+                if detections:
+                    stats['images_with_objects'] += 1
+                    stats['detected'] += len(detections)
+                    stats['detections'][image_path] = detections
+                    image_logger.debug(
+                        f"Found {len(detections)} {CATEGORIES[category]['noun']} in {os.path.basename(image_path)}",
+                        extra=log_context(job),
+                    )
+            except Exception as e:
+                image_logger.warning(f"Error processing {image_path}: {e}", extra=log_context(job))
+                stats['errors'] += 1
+            stats['progress'].append(image_path)
+
+def checkpoint_job(postgres, job):
+    """Commit the detections and per-image progress gathered since the last checkpoint,
+    so a failed or interrupted job can resume from here instead of starting over."""
+    stats = job['stats']
+    if not stats['progress']:
+        return
+    try:
+        _write_checkpoint(postgres, job)
+    except Exception:
+        postgres.rollback()
+        raise
+    stats['detections'] = {}
+    stats['frames'] = {}
+    stats['progress'] = []
+
+def _write_checkpoint(postgres, job):
+    req_id, category, stats = job['req_id'], job['category'], job['stats']
+    with postgres.cursor() as cur:
+        rows = [
+            (req_id, category, image_path, label, float(confidence), int(x), int(y), int(w), int(h),
+             *stats['frames'].get(image_path, (None, None)))
+            for image_path, detections in stats['detections'].items()
+            for label, (x, y, w, h), confidence in detections
+        ]
+        if rows:
+            execute_values(
+                cur,
+                f"INSERT INTO {TableNames.DETECTED_OBJECTS.value} "
+                "(req_id, category, image_path, object_label, confidence, bbox_x, bbox_y, bbox_w, bbox_h, "
+                "frame_index, frame_time) VALUES %s",
+                rows
+            )
+            # Keep the summary counts in step with the rows, so label summaries never
+            # have to scan detected_objects.
+            counts = Counter(row[3] for row in rows)
+            execute_values(
+                cur,
+                f"INSERT INTO {TableNames.REQUEST_LABEL_COUNTS.value} AS c (req_id, object_label, count) VALUES %s "
+                "ON CONFLICT (req_id, object_label) DO UPDATE SET count = c.count + EXCLUDED.count",
+                [(req_id, label, n) for label, n in counts.items()]
+            )
+            execute_values(
+                cur,
+                f"INSERT INTO {TableNames.DAILY_LABEL_COUNTS.value} AS c (day, category, object_label, count) VALUES %s "
+                "ON CONFLICT (day, category, object_label) DO UPDATE SET count = c.count + EXCLUDED.count",
+                [(category, label, n) for label, n in counts.items()],
+                template="(CURRENT_DATE, %s, %s, %s)"
+            )
+        execute_values(
+            cur,
+            f"INSERT INTO {TableNames.DETECTION_PROGRESS.value} (req_id, image_path) VALUES %s ON CONFLICT DO NOTHING",
+            [(req_id, image_path) for image_path in stats['progress']]
+        )
+        cur.execute(
+            f"UPDATE {TableNames.DETECTION_REQUEST.value} "
+            "SET processed_images = processed_images + %s, skipped_duplicates = %s, heartbeat_at = CURRENT_TIMESTAMP "
+            "WHERE req_id = %s",
+            (len(stats['progress']), stats['skipped_duplicates'], req_id)
+        )
+        postgres.commit()
+
+class DetectionTask:
+    """Jobs submitted together, processed by the scheduler in chunks of images. An image
+    referenced by jobs of several tenants is a single entry, decoded once for all of
+    them. Each tenant's turn takes the next chunk of the entries its own jobs reference;
+    entries another tenant's turn already processed are skipped."""
+
+    def __init__(self, jobs, priority=PRIORITY_INTERACTIVE):
+        self.jobs = jobs
+        self.tenants = list(dict.fromkeys(job['r_id'] for job in jobs))
+        self.priority = priority
+        self.submitted_at = time.time()
+        self.started_at = {}
+        self.entries = None
+        # Per tenant, the indexes of the entries its jobs reference, in folder order, and
+        # how many of those were already processed on another tenant's turn.
+        self.lanes = {}
+        self.skipped = Counter()
+        self.processed = set()
+        self.streams = deque()
+        self.detectors = {}
+        self.duplicates = DuplicateIndex()
+        self.profile_mode = profiling_mode(jobs)
+        self.profiler = new_profiler(self.profile_mode) if self.profile_mode else None
+
+    def remaining(self, tenant):
+        # Video frames are sampled as they are decoded, so only image files are counted.
+        if self.entries is None:
+            return None
+        return len(self.lanes.get(tenant, ())) - self.skipped[tenant]
+
+    def prepare(self):
+        consumers = {}
+        videos = {}
+        for job in self.jobs:
+            if not get_storage(job['abs_path']).exists(job['abs_path']):
+                job['error'] = f"The folder {job['abs_path']} does not exist."
+                continue
+            if os.path.isfile(job['abs_path']) and is_video(job['abs_path']):
+                options = job['options']
+                key = (os.path.realpath(job['abs_path']), options.get('frame_stride'), options.get('scene_threshold'))
+                videos.setdefault(key, []).append(job)
+                continue
+            try:
+                image_paths = list_images(job['abs_path'])
+            except Exception as e:
+                job['error'] = str(e)
+                continue
+            for image_path in image_paths:
+                if image_path not in job['completed_images']:
+                    consumers.setdefault(get_storage(image_path).canonical(image_path), []).append((job, image_path))
+        self.entries = list(consumers.items())
+        for index, (_, image_consumers) in enumerate(self.entries):
+            for tenant in entry_tenants(image_consumers):
+                self.lanes.setdefault(tenant, deque()).append(index)
+        for (real_path, stride, scene_threshold), jobs in videos.items():
+            frames = sample_frames(real_path, stride, scene_threshold, should_stop=self.stream_stopper(jobs))
+            self.streams.append((real_path, jobs, frames))
+
+        postgres = get_connection()
+        for job in self.live_jobs():
+            key = (job['category'], job['options']['tier'])
+            if key not in self.detectors:
+                self.detectors[key] = get_detector(*key)
+            set_job_status(postgres, job, 'processing')
+
+    @staticmethod
+    def stream_done(jobs):
+        return all(job['error'] is not None or stop_reason(job) for job in jobs)
+
+    def stream_stopper(self, jobs):
+        """The should_stop check of a video stream: true once none of its jobs is live."""
+        polled_at = time.monotonic()
+
+        def should_stop():
+            nonlocal polled_at
+            if time.monotonic() - polled_at >= STREAM_POLL_SECONDS:
+                polled_at = time.monotonic()
+                self.poll_cancellations()
+            return self.stream_done(jobs)
+
+        return should_stop
+
+    def close_stream(self, stream):
+        """Drop a video stream and release its capture now rather than when the task is
+        garbage collected."""
+        self.streams.remove(stream)
+        stream[2].close()
+
+    def live_jobs(self, tenant=None):
+        return [
+            job for job in self.jobs
+            if job['error'] is None and not stop_reason(job) and tenant in (None, job['r_id'])
+        ]
+
+    def poll_cancellations(self):
+        """Pick up cancellations made through another worker process, which can only
+        reach this job through its status row."""
+        jobs = {job['req_id']: job for job in self.live_jobs()}
+        if not jobs:
+            return
+        postgres = get_connection()
+        with postgres, postgres.cursor() as cur:
+            cur.execute(
+                f"SELECT req_id FROM {TableNames.DETECTION_REQUEST.value} WHERE req_id = ANY(%s) AND status = 'cancelling'",
+                (list(jobs),)
+            )
+            for (req_id,) in cur.fetchall():
+                jobs[req_id]['stop_reason'] = 'cancelled'
+
+    def run_chunk(self, chunk_size, tenant):
+        if self.profiler is None:
+            return self._run_chunk(chunk_size, tenant)
+        self.profiler.enable()
+        try:
+            return self._run_chunk(chunk_size, tenant)
+        finally:
+            self.profiler.disable()
+
+    def _run_chunk(self, chunk_size, tenant):
+        self.poll_cancellations()
+        if not self.live_jobs(tenant):
+            return False
+        if self.entries is None:
+            self.prepare()
+        chunk = self.next_entries(chunk_size, tenant)
+        if chunk:
+            detect_entries(chunk, self.detectors, self.duplicates)
+        else:
+            chunk, frames = self.next_frames(chunk_size, tenant)
+            detect_entries(chunk, self.detectors, self.duplicates, images=frames)
+        postgres = get_connection()
+        for job in self.jobs:
+            if not job['stats']['progress']:
+                continue
+            checkpoint_job(postgres, job)
+            stats = job['stats']
+            logger.info(
+                f"Progress: {stats['processed']} images processed, {stats['images_with_objects']} with objects, "
+                f"{stats['errors']} errors",
+                extra=log_context(job),
+            )
+        has_work = self.remaining(tenant) > 0 or any(self.tenant_stream(stream, tenant) for stream in self.streams)
+        return has_work and bool(self.live_jobs(tenant))
+
+    def next_entries(self, count, tenant):
+        """Take up to count unprocessed entries from the tenant's lane."""
+        lane = self.lanes.get(tenant, deque())
+        chunk = []
+        while lane and len(chunk) < count:
+            index = lane.popleft()
+            if index in self.processed:
+                self.skipped[tenant] -= 1
+                continue
+            self.processed.add(index)
+            entry = self.entries[index]
+            for other in entry_tenants(entry[1]):
+                if other != tenant:
+                    self.skipped[other] += 1
+            chunk.append(entry)
+        return chunk
+
+    @staticmethod
+    def tenant_stream(stream, tenant):
+        return any(job['r_id'] == tenant for job in stream[1])
+
+    def next_frames(self, count, tenant):
+        """Pull up to count sampled frames from the tenant's first unfinished video, as
+        entries plus their decoded frames. A video that cannot be read fails only its
+        own jobs."""
+        while True:
+            stream = next((stream for stream in self.streams if self.tenant_stream(stream, tenant)), None)
+            if stream is None:
+                break
+            real_path, jobs, frames = stream
+            if self.stream_done(jobs):
+                self.close_stream(stream)
+                continue
+            try:
+                sampled = list(islice(frames, count))
+            except Exception as e:
+                for job in jobs:
+                    job['error'] = str(e)
+                sampled = []
+            if not sampled:
+                self.close_stream(stream)
+                continue
+
+            entries = []
+            for index, seconds, _ in sampled:
+                image_consumers = []
+                for job in jobs:
+                    image_path = frame_path(job['abs_path'], index)
+                    if image_path not in job['completed_images']:
+                        job['stats']['frames'][image_path] = (index, seconds)
+                        image_consumers.append((job, image_path))
+                entries.append((frame_path(real_path, index), image_consumers))
+            return entries, [frame for _, _, frame in sampled]
+        return [], []
+
+    def fail(self, error):
+        for job in self.jobs:
+            job['error'] = job['error'] or str(error) or ErrorMessages.GENERIC_ERROR.value
+
+    def finish(self):
+        for stream in list(self.streams):
+            self.close_stream(stream)
+        if self.profiler is not None:
+            try:
+                save_profile(self.profiler, self.profile_mode, [job['req_id'] for job in self.jobs])
+            except Exception as e:
+                logger.error(f"DetectionTask: Failed to save profile - {e}")
+        for job in self.jobs:
+            try:
+                job['result'] = finish_job(job)
+            finally:
+                # Only successful results are worth sharing; a retry after a failure,
+                # cancellation or timeout must run again.
+                if job['result'] and job['result']['success']:
+                    inflight.release(job)
+                else:
+                    inflight.forget(job)
+                with _active_lock:
+                    active_jobs.pop(job['req_id'], None)
+                job['done'].set()
+
+def finish_job(job):
+    """Persist a job's detections and final status, returning the route-facing result."""
+    spec = CATEGORIES[job['category']]
+    prefix = f"start_{spec['name']}_detection()"
+    req_id = job['req_id']
+    success = False
+    msg = ""
+    postgres = get_connection()
+    token = bind(**log_context(job))
+
+    try:
+        # Flush whatever the last chunk produced; a stopped or failed job keeps it too.
+        checkpoint_job(postgres, job)
+        if job['error']:
+            raise Exception(job['error'])
+
+        stopped = job['stop_reason']
+        if not stopped and not job['stats']['images_with_objects']:
+            raise Exception(f"No {spec['noun']} detected in the provided folder.")
+
+        logger.info(f"{prefix}: Detections saved for {job['stats']['images_with_objects']} images")
+        set_job_status(postgres, job, stopped or 'completed')
+
+        if stopped:
+            msg = f"{spec['title']} detection {stopped.replace('_', ' ')} after {job['stats']['processed']} images"
+        else:
+            success = True
+            msg = f"{spec['title']} detection process completed successfully"
+            if job['stats']['skipped_duplicates']:
+                msg += f" ({job['stats']['skipped_duplicates']} near-duplicate images reused earlier detections)"
+    except Exception as e:
+        logger.error(f"{prefix}: Error - {str(e)}")
+        msg = str(e) or ErrorMessages.GENERIC_ERROR.value
+        try:
+            postgres.rollback()
+            set_job_status(postgres, job, 'stuck')
+        except Exception as db_e:
+            logger.error(f"{prefix}: Failed to update status - {db_e}")
+    finally:
+        logger.info(f"{prefix}: Completed for req_id={req_id}, success={success}")
+        unbind(token)
+        return {"success": success, "msg": msg, "req_id": req_id}
+
+def cancel_request(req_id):
+    """Request cancellation of a queued or running job. The owning worker stops at its
+    next image; a job owned by another worker process stops at its next chunk, when it
+    sees the 'cancelling' status. Returns (success, msg)."""
+    with _active_lock:
+        job = active_jobs.get(req_id)
+    if job is not None:
+        job['stop_reason'] = job['stop_reason'] or 'cancelled'
+
+    postgres = get_connection()
+    with postgres.cursor() as cur:
+        cur.execute(
+            f"UPDATE {TableNames.DETECTION_REQUEST.value} SET status = 'cancelling' "
+            "WHERE req_id = %s AND status IN ('queued', 'processing') RETURNING req_id",
+            (req_id,)
+        )
+        updated = cur.fetchone()
+        postgres.commit()
+    if updated or job is not None:
+        status_cache.set(req_id, 'cancelling')
+        return True, f"Cancellation of {req_id} requested"
+
+    with postgres, postgres.cursor() as cur:
+        cur.execute(
+            f"SELECT status, coalesced_into FROM {TableNames.DETECTION_REQUEST.value} WHERE req_id = %s",
+            (req_id,)
+        )
+        result = cur.fetchone()
+    if not result:
+        return False, f"Process {req_id} not found"
+    if result[1]:
+        return False, f"Process {req_id} shares the results of {result[1]}; cancel that request instead"
+    return False, f"Process {req_id} is already {result[0]}"
+
+def entry_tenants(image_consumers):
+    return dict.fromkeys(job['r_id'] for job, _ in image_consumers)
+
+_heartbeat = PerProcess()
+
+def heartbeat_active_jobs():
+    """Keep heartbeat_at fresh for every job this process owns, queued or running, so
+    only jobs of dead workers look orphaned (see classification/recovery.py)."""
+    while True:
+        time.sleep(env.HEARTBEAT_SECONDS)
+        with _active_lock:
+            req_ids = list(active_jobs)
+        if not req_ids:
+            continue
+        try:
+            postgres = get_connection()
+            with postgres.cursor() as cur:
+                cur.execute(
+                    f"UPDATE {TableNames.DETECTION_REQUEST.value} SET heartbeat_at = CURRENT_TIMESTAMP WHERE req_id = ANY(%s)",
+                    (req_ids,)
+                )
+                postgres.commit()
+        except Exception as e:
+            logger.error(f"heartbeat_active_jobs(): {e}")
+
+def ensure_heartbeat():
+    if not _heartbeat.claim():
+        return
+    threading.Thread(target=heartbeat_active_jobs, name="job-heartbeat", daemon=True).start()
+
+def submit_jobs(jobs, priority):
+    """Register jobs as owned by this process and hand them to the scheduler as one
+    task, scheduled fairly across its tenants."""
+    ensure_heartbeat()
+    with _active_lock:
+        active_jobs.update((job['req_id'], job) for job in jobs)
+    scheduler.submit(DetectionTask(jobs, priority))
+
+def queued_result(entry):
+    if 'primary' in entry:
+        return {"success": True, "msg": f"Attached to in-flight request {entry['primary']['req_id']}", "req_id": entry['req_id']}
+    return {"success": True, "msg": "Detection request queued", "req_id": entry['req_id']}
+
+def entry_result(entry):
+    if 'primary' not in entry:
+        return entry['result']
+    result = entry['primary']['result']
+    return {**result, "msg": f"{result['msg']} (shared with {result['req_id']})", "req_id": entry['req_id']}
+
+def fail_jobs(jobs, msg):
+    for job in jobs:
+        inflight.forget(job)
+        job['result'] = {"success": False, "msg": msg, "req_id": job['req_id']}
+        job['done'].set()
+
+async def run_batch_detection(items, priority=PRIORITY_BULK, wait=True):
+    """Create several detection requests with one INSERT and hand them to the scheduler
+    as one task. A submission identical to a job that is still running (or just
+    finished) gets its own req_id but attaches to that job instead of running again.
+    Waits for completion unless wait is False."""
+    entries, jobs, aliases = [], [], []
+    for item in items:
+        job = create_job(item)
+        primary = inflight.claim(coalesce_key(item), job)
+        if primary is None:
+            jobs.append(job)
+            entries.append(job)
+        else:
+            alias = {'req_id': job['req_id'], 'r_id': job['r_id'], 'category': job['category'], 'primary': primary}
+            aliases.append(alias)
+            entries.append(alias)
+    logger.info(f"run_batch_detection(): Queueing {len(jobs)} requests, {len(aliases)} coalesced")
+
+    postgres = get_connection()
+    if not postgres:
+        logger.error("run_batch_detection(): Postgres connection failed")
+        fail_jobs(jobs, "Database connection failed")
+        return [{"success": False, "msg": "Database connection failed", "req_id": entry['req_id']} for entry in entries]
+
+    try:
+        insert_requests(postgres, jobs, aliases)
+    except Exception as e:
+        logger.error(f"run_batch_detection(): Failed to insert requests - {e}")
+        postgres.rollback()
+        msg = str(e) or ErrorMessages.GENERIC_ERROR.value
+        fail_jobs(jobs, msg)
+        return [{"success": False, "msg": msg, "req_id": entry['req_id']} for entry in entries]
+
+    for alias in aliases:
+        alias['primary']['aliases'].append(alias['req_id'])
+    submit_jobs(jobs, priority)
+    if not wait:
+        return [queued_result(entry) for entry in entries]
+
+    for entry in entries:
+        await asyncio.to_thread(entry.get('primary', entry)['done'].wait)
+    return [entry_result(entry) for entry in entries]
+
+async def run_detection(category, r_id, abs_path, options=None, priority=PRIORITY_INTERACTIVE, wait=True):
+    item = {'r_id': r_id, 'abs_path': abs_path, 'category': category, 'options': options}
+    results = await run_batch_detection([item], priority, wait)
+    return results[0]
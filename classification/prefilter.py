@@ -0,0 +1,62 @@
+import threading
+import cv2
+import numpy as np
+import data.env as env
+
+THUMB_SIZE = 64
+
+def thumbnail(img):
+    return cv2.resize(img, (THUMB_SIZE, THUMB_SIZE), interpolation=cv2.INTER_AREA)
+
+def sea_score(img):
+    """Fraction of the lower two thirds of a thumbnail covered by blue-green water tones."""
+    hsv = cv2.cvtColor(thumbnail(img), cv2.COLOR_BGR2HSV)[THUMB_SIZE // 3:]
+    hue, sat, val = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+    water = (hue >= 80) & (hue <= 130) & (sat >= 40) & (val >= 40)
+    return float(water.mean())
+
+def mountains_score(img):
+    """Sky in the top third of a thumbnail, textured terrain in the middle third."""
+    thumb = thumbnail(img)
+    hsv = cv2.cvtColor(thumb, cv2.COLOR_BGR2HSV)
+    third = THUMB_SIZE // 3
+
+    top = hsv[:third]
+    blue_sky = (top[..., 0] >= 90) & (top[..., 0] <= 130) & (top[..., 1] >= 30)
+    overcast = (top[..., 1] < 40) & (top[..., 2] > 150)
+    sky = float((blue_sky | overcast).mean())
+
+    gray = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY)[third:2 * third].astype(np.float32)
+    texture = min(1.0, float(cv2.Laplacian(gray, cv2.CV_32F).std()) / 40.0)
+    return 0.5 * sky + 0.5 * texture
+
+SCORERS = {
+    'sea': sea_score,
+    'mountains': mountains_score,
+}
+
+THRESHOLDS = {
+    'sea': env.PREFILTER_SEA_THRESHOLD,
+    'mountains': env.PREFILTER_MOUNTAINS_THRESHOLD,
+}
+
+_lock = threading.Lock()
+_counts = {category: {'scored': 0, 'rejected': 0} for category in SCORERS}
+
+def passes(category, img, threshold=None):
+    """First stage of the cascade: False when the thumbnail score says the image clearly
+    cannot contain the category, so the detector does not need to run."""
+    threshold = THRESHOLDS[category] if threshold is None else threshold
+    passed = SCORERS[category](img) >= threshold
+    with _lock:
+        _counts[category]['scored'] += 1
+        if not passed:
+            _counts[category]['rejected'] += 1
+    return passed
+
+def metrics():
+    with _lock:
+        return {
+            category: {**counts, 'threshold': THRESHOLDS[category]}
+            for category, counts in _counts.items()
+        }
@@ -0,0 +1,127 @@
+import cProfile
+import json
+import os
+import sys
+import threading
+from collections import Counter
+import data.env as env
+
+PROFILE_MODES = ('sampling', 'cprofile')
+PROFILE_EXTENSIONS = {'sampling': 'folded', 'cprofile': 'prof'}
+# Written by the admin endpoint so every worker process sees the same switch.
+GLOBAL_SETTINGS = 'global.json'
+
+class SamplingProfiler:
+    """Samples the stack of the thread running a task every interval and counts
+    collapsed stacks ("root;caller;callee count"), the input format of flamegraph.pl
+    and speedscope. Sampling only runs between enable() and disable()."""
+
+    def __init__(self, interval=None):
+        self.interval = (env.PROFILE_SAMPLE_INTERVAL_MS if interval is None else interval) / 1000
+        self.stacks = Counter()
+        self._stop = None
+        self._sampler = None
+
+    def enable(self):
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(
+            target=self._sample, args=(threading.get_ident(), self._stop), name="profile-sampler", daemon=True
+        )
+        self._sampler.start()
+
+    def disable(self):
+        self._stop.set()
+        self._sampler.join()
+
+    def _sample(self, target, stop):
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+class CProfileProfiler:
+    """Deterministic cProfile of the task's chunks, saved as pstats data."""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def enable(self):
+        self.profile.enable()
+
+    def disable(self):
+        self.profile.disable()
+
+    def save(self, path):
+        self.profile.dump_stats(path)
+
+def new_profiler(mode):
+    return SamplingProfiler() if mode == 'sampling' else CProfileProfiler()
+
+# (inode, mtime) of the settings file and the mode read from it. The admin endpoint
+# replaces the file, so either changes whenever any worker switches profiling.
+_global_cache = (None, None)
+
+def global_profiling():
+    """Return the profiling mode switched on for all requests, or None. The file is only
+    parsed again after it changed, so a task start costs one stat()."""
+    global _global_cache
+    path = os.path.join(env.PROFILE_DIR, GLOBAL_SETTINGS)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    version = (stat.st_ino, stat.st_mtime_ns)
+    cached_version, mode = _global_cache
+    if version == cached_version:
+        return mode
+    try:
+        with open(path) as f:
+            settings = json.load(f)
+    except (OSError, ValueError):
+        return None
+    mode = settings.get('mode') if settings.get('enabled') else None
+    _global_cache = (version, mode)
+    return mode
+
+def set_global_profiling(enabled, mode='sampling'):
+    global _global_cache
+    os.makedirs(env.PROFILE_DIR, exist_ok=True)
+    path = os.path.join(env.PROFILE_DIR, GLOBAL_SETTINGS)
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'enabled': enabled, 'mode': mode}, f)
+    os.replace(path + '.tmp', path)
+    stat = os.stat(path)
+    _global_cache = ((stat.st_ino, stat.st_mtime_ns), mode if enabled else None)
+
+def profiling_mode(jobs):
+    """The profiling mode of a task: requested by one of its jobs or switched on globally."""
+    for job in jobs:
+        requested = job['options'].get('profile')
+        if requested:
+            return requested if requested in PROFILE_MODES else 'sampling'
+    return global_profiling()
+
+def profile_path(req_id, mode):
+    return os.path.join(env.PROFILE_DIR, f"{req_id}.{PROFILE_EXTENSIONS[mode]}")
+
+def find_profile(req_id):
+    for mode in PROFILE_MODES:
+        path = profile_path(req_id, mode)
+        if os.path.exists(path):
+            return path
+    return None
+
+def save_profile(profiler, mode, req_ids):
+    os.makedirs(env.PROFILE_DIR, exist_ok=True)
+    for req_id in req_ids:
+        profiler.save(profile_path(req_id, mode))
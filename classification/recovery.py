@@ -0,0 +1,114 @@
+import logging
+import threading
+import time
+import data.env as env
+from classification.pipeline import create_job, submit_jobs
+from classification.scheduler import PRIORITY_BULK
+from database.postgres import get_connection
+from database.status_cache import status_cache
+from data.per_process import PerProcess
+from data.table_names import TableNames
+
+logger = logging.getLogger(__name__)
+
+# A job is orphaned when it is still marked active but no worker has refreshed its
+# heartbeat (pipeline.heartbeat_active_jobs) within ORPHAN_TIMEOUT_SECONDS.
+STALE = "COALESCE(heartbeat_at, created_at) < CURRENT_TIMESTAMP - make_interval(secs => %s)"
+RESUMABLE = "coalesced_into IS NULL AND abs_path IS NOT NULL"
+
+_monitor = PerProcess()
+
+def load_job(postgres, row):
+    """Rebuild a job from its detection_request row and its checkpointed progress."""
+    req_id, r_id, category, abs_path, options, skipped_duplicates = row
+    job = create_job({'r_id': r_id, 'abs_path': abs_path, 'category': category, 'options': options or {}}, req_id=req_id)
+    with postgres, postgres.cursor() as cur:
+        cur.execute(f"SELECT image_path FROM {TableNames.DETECTION_PROGRESS.value} WHERE req_id = %s", (req_id,))
+        job['completed_images'] = {image_path for (image_path,) in cur.fetchall()}
+        cur.execute(
+            f"SELECT COUNT(*), COUNT(DISTINCT image_path) FROM {TableNames.DETECTED_OBJECTS.value} "
+            "WHERE req_id = %s AND category = %s",
+            (req_id, category)
+        )
+        detected, images_with_objects = cur.fetchone()
+    job['stats']['processed'] = len(job['completed_images'])
+    job['stats']['detected'] = detected
+    job['stats']['images_with_objects'] = images_with_objects
+    job['stats']['skipped_duplicates'] = skipped_duplicates or 0
+    return job
+
+def requeue(postgres, rows):
+    jobs = [load_job(postgres, row) for row in rows]
+    for job in jobs:
+        status_cache.set(job['req_id'], 'queued')
+    if jobs:
+        submit_jobs(jobs, PRIORITY_BULK)
+    return jobs
+
+def resume_request(req_id):
+    """Continue a 'stuck' or orphaned request from its last checkpoint. Returns (success, msg)."""
+    postgres = get_connection()
+    with postgres.cursor() as cur:
+        cur.execute(
+            f"UPDATE {TableNames.DETECTION_REQUEST.value} SET status = 'queued', heartbeat_at = CURRENT_TIMESTAMP "
+            f"WHERE req_id = %s AND {RESUMABLE} "
+            f"AND (status = 'stuck' OR (status IN ('queued', 'processing') AND {STALE})) "
+            "RETURNING req_id, r_id, category, abs_path, options, skipped_duplicates",
+            (req_id, env.ORPHAN_TIMEOUT_SECONDS)
+        )
+        rows = cur.fetchall()
+        postgres.commit()
+
+    if not rows:
+        return False, f"Process {req_id} is not stuck or orphaned, or cannot be resumed"
+    job = requeue(postgres, rows)[0]
+    return True, f"Process {req_id} resumed after {job['stats']['processed']} checkpointed images"
+
+def requeue_orphaned_jobs():
+    """Claim active requests whose worker died and continue them here. Rows are claimed
+    with SKIP LOCKED, so workers sweeping at the same time never pick the same job."""
+    postgres = get_connection()
+    try:
+        with postgres.cursor() as cur:
+            cur.execute(
+                f"UPDATE {TableNames.DETECTION_REQUEST.value} SET status = 'cancelled' "
+                f"WHERE status = 'cancelling' AND {STALE}",
+                (env.ORPHAN_TIMEOUT_SECONDS,)
+            )
+            cur.execute(
+                f"UPDATE {TableNames.DETECTION_REQUEST.value} SET status = 'stuck' "
+                f"WHERE status IN ('queued', 'processing') AND NOT ({RESUMABLE}) AND coalesced_into IS NULL AND {STALE}",
+                (env.ORPHAN_TIMEOUT_SECONDS,)
+            )
+            cur.execute(
+                f"UPDATE {TableNames.DETECTION_REQUEST.value} SET status = 'queued', heartbeat_at = CURRENT_TIMESTAMP "
+                f"WHERE req_id IN ("
+                f"SELECT req_id FROM {TableNames.DETECTION_REQUEST.value} "
+                f"WHERE status IN ('queued', 'processing') AND {RESUMABLE} AND {STALE} "
+                "FOR UPDATE SKIP LOCKED) "
+                "RETURNING req_id, r_id, category, abs_path, options, skipped_duplicates",
+                (env.ORPHAN_TIMEOUT_SECONDS,)
+            )
+            rows = cur.fetchall()
+            postgres.commit()
+    except Exception as e:
+        logger.error(f"requeue_orphaned_jobs(): {e}")
+        postgres.rollback()
+        return []
+
+    jobs = requeue(postgres, rows)
+    if jobs:
+        logger.info(f"requeue_orphaned_jobs(): Requeued {len(jobs)} orphaned requests")
+    return jobs
+
+def monitor_orphans():
+    while True:
+        requeue_orphaned_jobs()
+        time.sleep(env.ORPHAN_TIMEOUT_SECONDS)
+
+def start_orphan_monitor():
+    """Sweep for orphaned jobs now and then every ORPHAN_TIMEOUT_SECONDS, which also
+    catches jobs whose heartbeat was still fresh when this worker started."""
+    if not _monitor.claim():
+        return
+    threading.Thread(target=monitor_orphans, name="orphan-monitor", daemon=True).start()
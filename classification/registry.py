@@ -0,0 +1,208 @@
+import threading
+import numpy as np
+import data.env as env
+from classification import fake_detector
+from classification import prefilter as scene_prefilter
+from classification.thread_budget import apply_thread_budget
+from classification.animals import detector as animals_detector
+from classification.cars import detector as cars_detector
+from classification.food import detector as food_detector
+from classification.mountains import detector as mountains_detector
+from classification.plants import detector as plants_detector
+from classification.sea import detector as sea_detector
+
+# Per-request settings passed into the YOLO call itself (see yolo_filters.predict_args).
+YOLO_OPTIONS = {'classes', 'confidence', 'iou', 'max_det'}
+IOU_RANGE = (0.1, 0.9)
+
+# Quality tiers bundle the weights, the square input size and the default confidence
+# threshold of a category. 'balanced' is what every category ran before tiers existed.
+QUALITY_TIERS = ('fast', 'balanced', 'accurate')
+COCO_TIERS = {
+    'fast': {'model': 'yolov8n.pt', 'input_size': 480, 'confidence': 0.5},
+    'balanced': {'model': 'yolov8n.pt', 'input_size': 640, 'confidence': 0.5},
+    'accurate': {'model': 'yolov8m.pt', 'input_size': 960, 'confidence': 0.4},
+}
+OIV7_TIERS = {
+    'fast': {'model': 'yolov8n-oiv7.pt', 'input_size': 480, 'confidence': 0.5},
+    'balanced': {'model': 'yolov8n-oiv7.pt', 'input_size': 640, 'confidence': 0.5},
+    'accurate': {'model': 'yolov8m-oiv7.pt', 'input_size': 960, 'confidence': 0.4},
+}
+ADE20K_TIERS = {
+    'fast': {'model': 'efficientdet_lite0_ade20k.h5', 'input_size': 320, 'confidence': 0.5},
+    'balanced': {'model': 'efficientdet_d0_ade20k.h5', 'input_size': 512, 'confidence': 0.5},
+    'accurate': {'model': 'efficientdet_d1_ade20k.h5', 'input_size': 640, 'confidence': 0.4},
+}
+
+CATEGORIES = {
+    'animals': {
+        'module': animals_detector,
+        'detect_single': animals_detector.detect_animals_single,
+        'backend': 'yolo',
+        'options': {'tiled', 'tier'} | YOLO_OPTIONS,
+        'tiers': COCO_TIERS,
+        # Labels a request may restrict to (matched case-insensitively), the lowest
+        # confidence and the most detections per image a request may ask for.
+        'labels': set(animals_detector.ANIMAL_CLASSES.values()),
+        'limits': {'min_confidence': 0.1, 'max_det': 300},
+        'name': 'animal',
+        'title': 'Animal',
+        'noun': 'animals',
+    },
+    'food': {
+        'module': food_detector,
+        'detect_single': food_detector.detect_food_single,
+        'backend': 'yolo',
+        'options': {'tier'} | YOLO_OPTIONS,
+        'tiers': COCO_TIERS,
+        'labels': set(food_detector.FOOD_CLASSES.values()),
+        'limits': {'min_confidence': 0.1, 'max_det': 100},
+        'name': 'food',
+        'title': 'Food',
+        'noun': 'food items',
+    },
+    'plants': {
+        'module': plants_detector,
+        'detect_single': plants_detector.detect_plants_single,
+        'backend': 'yolo',
+        'options': {'tier'} | YOLO_OPTIONS,
+        'tiers': OIV7_TIERS,
+        'labels': set(plants_detector.PLANT_LABELS),
+        'limits': {'min_confidence': 0.1, 'max_det': 300},
+        'name': 'plant',
+        'title': 'Plant',
+        'noun': 'plants',
+    },
+    'mountains': {
+        'module': mountains_detector,
+        'detect_single': mountains_detector.detect_mountains_single,
+        'backend': 'keras',
+        'options': {'prefilter', 'tier'},
+        'tiers': ADE20K_TIERS,
+        'name': 'mountain',
+        'title': 'Mountain',
+        'noun': 'mountains',
+    },
+    'sea': {
+        'module': sea_detector,
+        'detect_single': sea_detector.detect_sea_single,
+        'backend': 'keras',
+        'options': {'prefilter', 'tier'},
+        'tiers': ADE20K_TIERS,
+        'name': 'sea',
+        'title': 'Sea',
+        'noun': 'sea areas',
+    },
+    'cars': {
+        'module': cars_detector,
+        'detect_single': cars_detector.detect_cars_single,
+        'backend': 'yolo',
+        'options': {'tiled', 'tier'} | YOLO_OPTIONS,
+        'tiers': COCO_TIERS,
+        'labels': set(cars_detector.CAR_CLASSES.values()),
+        'limits': {'min_confidence': 0.1, 'max_det': 1000},
+        'name': 'car',
+        'title': 'Car',
+        'noun': 'cars',
+    },
+}
+
+_detectors = {}
+_load_lock = threading.Lock()
+_inference_locks = {}
+_locks_lock = threading.Lock()
+
+def tier_settings(category, tier=None):
+    return CATEGORIES[category]['tiers'][tier or env.DEFAULT_QUALITY_TIER]
+
+def model_key(category, tier=None):
+    """What identifies a loaded model: its weights, plus the input size a Keras model is
+    compiled for. YOLO takes imgsz per call, so one YOLO model serves every category and
+    tier that name the same weights (yolov8n.pt: animals, food and cars, fast and
+    balanced)."""
+    spec = CATEGORIES[category]
+    settings = tier_settings(category, tier)
+    if spec['backend'] == 'yolo':
+        return spec['backend'], settings['model']
+    return spec['backend'], settings['model'], settings['input_size']
+
+def inference_lock(category, tier=None):
+    """The lock serializing calls into the shared model of a (category, tier); categories
+    and tiers sharing a model share its lock."""
+    key = model_key(category, tier)
+    lock = _inference_locks.get(key)
+    if lock is None:
+        with _locks_lock:
+            lock = _inference_locks.setdefault(key, threading.Lock())
+    return lock
+
+def load_detector(category, tier=None):
+    if env.FAKE_DETECTOR:
+        return fake_detector.initialize_detector()
+    spec = CATEGORIES[category]
+    settings = tier_settings(category, tier)
+    if spec['backend'] == 'yolo':
+        return spec['module'].initialize_detector(settings['model'])
+    return spec['module'].initialize_detector(settings['model'], (settings['input_size'], settings['input_size']))
+
+def get_detector(category, tier=None, configure_threads=True):
+    """Return the process-wide detector for a (category, tier), loading its weights on
+    first use. Only tiers that requests actually ask for are ever loaded, and each set
+    of weights only once (see model_key).
+
+    The thread budget is applied on the first call in each process, before the model
+    can run. configure_threads=False skips it for the gunicorn master, which only loads
+    weights for its workers: framework thread pools set up before fork would be
+    inherited, and torch refuses a new inter-op size in the worker."""
+    if configure_threads:
+        apply_thread_budget()
+    key = model_key(category, tier)
+    detector = _detectors.get(key)
+    if detector is not None:
+        return detector
+
+    with _load_lock:
+        detector = _detectors.get(key)
+        if detector is None:
+            detector = load_detector(category, tier)
+            if detector is not None:
+                _detectors[key] = detector
+    return detector
+
+def detect_image(category, detector, image_path, img=None, confidence_threshold=None, prefilter=False,
+                 confidence=None, tier=None, **options):
+    """Run a category's single-image detector at a tier's input size. Model calls are
+    serialized per loaded model because it is shared by every request thread in the
+    process, and by every category and tier that use the same weights. With prefilter,
+    images the cheap scene scorer rejects return no detections without touching the
+    model. confidence is a request's own threshold, otherwise the tier's applies."""
+    settings = tier_settings(category, tier)
+    if confidence is not None:
+        confidence_threshold = confidence
+    elif confidence_threshold is None:
+        confidence_threshold = settings['confidence']
+    if prefilter and img is not None and not scene_prefilter.passes(category, img):
+        return []
+    if env.FAKE_DETECTOR:
+        detect_single = fake_detector.detect_single
+    else:
+        detect_single = CATEGORIES[category]['detect_single']
+        size = settings['input_size']
+        if CATEGORIES[category]['backend'] == 'yolo':
+            options['imgsz'] = size
+        else:
+            options['input_size'] = (size, size)
+    with inference_lock(category, tier):
+        return detect_single(detector, image_path, confidence_threshold, img=img, **options)
+
+def run_dummy_batch(category, detector, batch_size=1, tier=None):
+    """Push a blank batch through a detector so weights, graphs and kernels are ready
+    before the first real request."""
+    if env.FAKE_DETECTOR:
+        return
+    size = tier_settings(category, tier)['input_size']
+    with inference_lock(category, tier):
+        if CATEGORIES[category]['backend'] == 'yolo':
+            detector([np.zeros((size, size, 3), dtype=np.uint8)] * batch_size, imgsz=size, verbose=False)
+        else:
+            detector(np.zeros((batch_size, size, size, 3), dtype=np.float32))
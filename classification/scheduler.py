@@ -0,0 +1,165 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+import data.env as env
+from data.per_process import PerProcess
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BULK = 'bulk'
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BULK)
+
+class Scheduler:
+    """Fair, priority-aware chunk scheduler for detection tasks.
+
+    A task is anything with tenants, priority, submitted_at, started_at (a dict by
+    tenant), remaining(tenant), run_chunk(chunk_size, tenant) -> bool (True while the
+    tenant has work left in it), fail(error) and finish(). Tenants (r_id) of a priority
+    class are served round-robin one chunk at a time, so a large folder only holds a
+    worker for one chunk before the next tenant gets a turn. A task shared by several
+    tenants is queued under each of them and runs a chunk of that tenant's images on
+    each of its turns, never on two workers at once; finish() follows the last tenant's
+    last chunk. Interactive work is preferred, but every interactive_weight interactive
+    chunks a waiting bulk chunk is served so bulk traffic cannot starve.
+    """
+
+    def __init__(self, workers, chunk_size, interactive_weight):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.interactive_weight = interactive_weight
+        self._cond = threading.Condition()
+        self._queues = {priority: OrderedDict() for priority in PRIORITIES}
+        self._running = {}
+        self._pending = {}
+        self._interactive_streak = 0
+        self._waits = {}
+        self._started = PerProcess()
+
+    def _ensure_workers(self):
+        # Worker threads do not survive fork, so start them lazily in the serving process.
+        if not self._started.claim():
+            return
+        for index in range(self.workers):
+            threading.Thread(target=self._work, name=f"scheduler-{index}", daemon=True).start()
+
+    def submit(self, task):
+        with self._cond:
+            self._ensure_workers()
+            self._pending[task] = set(task.tenants)
+            for tenant in task.tenants:
+                self._enqueue(task, tenant)
+            self._cond.notify()
+        return task
+
+    def _enqueue(self, task, tenant, front=False):
+        tenants = self._queues[task.priority]
+        queue = tenants.get(tenant)
+        if queue is None:
+            queue = tenants[tenant] = deque()
+        if front:
+            queue.appendleft(task)
+        else:
+            queue.append(task)
+
+    def _next_task(self):
+        interactive = self._queues[PRIORITY_INTERACTIVE]
+        bulk = self._queues[PRIORITY_BULK]
+        if interactive and (not bulk or self._interactive_streak < self.interactive_weight):
+            order = (interactive, bulk)
+        else:
+            order = (bulk, interactive)
+
+        for tenants in order:
+            # A shared task running for another tenant is skipped until its chunk is done.
+            tenant = next((tenant for tenant, queue in tenants.items() if queue[0] not in self._running), None)
+            if tenant is None:
+                continue
+            queue = tenants.pop(tenant)
+            task = queue.popleft()
+            # Move the tenant to the back of the rotation whether or not it has more work queued.
+            if queue:
+                tenants[tenant] = queue
+            if tenants is interactive:
+                self._interactive_streak += 1
+            else:
+                self._interactive_streak = 0
+            self._running[task] = tenant
+            return task, tenant
+        return None
+
+    def _record_wait(self, task, tenant):
+        wait = task.started_at[tenant] - task.submitted_at
+        stats = self._waits.setdefault(tenant, {'tasks': 0, 'total_wait': 0.0, 'max_wait': 0.0, 'last_wait': 0.0})
+        stats['tasks'] += 1
+        stats['total_wait'] += wait
+        stats['max_wait'] = max(stats['max_wait'], wait)
+        stats['last_wait'] = wait
+
+    def _work(self):
+        while True:
+            with self._cond:
+                turn = self._next_task()
+                while turn is None:
+                    self._cond.wait()
+                    turn = self._next_task()
+                task, tenant = turn
+                if tenant not in task.started_at:
+                    task.started_at[tenant] = time.time()
+                    self._record_wait(task, tenant)
+
+            try:
+                more = task.run_chunk(self.chunk_size, tenant)
+            except Exception as e:
+                logger.error(f"Scheduler: task for {tenant} failed - {e}")
+                task.fail(e)
+                more = False
+
+            with self._cond:
+                del self._running[task]
+                if more:
+                    self._enqueue(task, tenant, front=True)
+                else:
+                    self._pending[task].discard(tenant)
+                done = not self._pending[task]
+                if done:
+                    del self._pending[task]
+                # Also wakes a worker for the task's other tenants, skipped while it ran.
+                self._cond.notify()
+            if done:
+                try:
+                    task.finish()
+                except Exception as e:
+                    logger.error(f"Scheduler: finishing task for {', '.join(task.tenants)} failed - {e}")
+
+    def metrics(self):
+        with self._cond:
+            tenants = {}
+
+            def tenant_entry(tenant):
+                return tenants.setdefault(tenant, {'queued_tasks': 0, 'running_tasks': 0, 'remaining_images': 0})
+
+            for priority, queues in self._queues.items():
+                for tenant, queue in queues.items():
+                    for task in queue:
+                        entry = tenant_entry(tenant)
+                        entry['queued_tasks'] += 1
+                        entry['remaining_images'] += task.remaining(tenant) or 0
+            for task, tenant in self._running.items():
+                entry = tenant_entry(tenant)
+                entry['running_tasks'] += 1
+                entry['remaining_images'] += task.remaining(tenant) or 0
+            for tenant, stats in self._waits.items():
+                entry = tenant_entry(tenant)
+                entry['avg_wait_seconds'] = stats['total_wait'] / stats['tasks']
+                entry['max_wait_seconds'] = stats['max_wait']
+                entry['last_wait_seconds'] = stats['last_wait']
+
+            return {
+                'queue_depth': {priority: sum(len(q) for q in queues.values()) for priority, queues in self._queues.items()},
+                'running': len(self._running),
+                'tenants': tenants,
+            }
+
+scheduler = Scheduler(env.SCHEDULER_WORKERS, env.SCHEDULER_CHUNK_SIZE, env.SCHEDULER_INTERACTIVE_WEIGHT)
@@ -0,0 +1,127 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+import data.env as env
+from classification.archives import is_archive, list_members, member_path, read_member, split_member_path
+from classification.thread_budget import decode_threads
+from storage.backends import get_storage, is_remote
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.mkv', '.webm', '.m4v'}
+MAX_IMAGES = env.MAX_IMAGES
+# Sampled frames are addressed as "<video path>#frame=<index>" wherever an image path is expected.
+FRAME_MARKER = '#frame='
+
+def list_images(input_folder, max_images=MAX_IMAGES):
+    """Image paths of a folder or object store prefix, or member paths of the images
+    inside a local zip or tar archive."""
+    if os.path.isfile(input_folder) and is_archive(input_folder):
+        return [member_path(input_folder, name) for name in list_members(input_folder, IMAGE_EXTENSIONS)][:max_images]
+    return get_storage(input_folder).list(input_folder, IMAGE_EXTENSIONS, max_images)
+
+class ReadFailure:
+    """Yielded by iter_decoded in place of an image whose read or decode raised, so one
+    bad file, archive member or object costs one image error instead of the task."""
+
+    def __init__(self, image_path, error):
+        self.image_path = image_path
+        self.error = error
+
+def _result(future, image_path):
+    try:
+        return future.result()
+    except Exception as e:
+        return ReadFailure(image_path, e)
+
+def iter_decoded(image_paths, threads=None):
+    """Yield decoded images in order while a small pool decodes the next ones ahead.
+    cv2.imread and cv2.imdecode release the GIL, so decoding overlaps with inference.
+    Object store reads are network bound, so they get one thread per pooled connection.
+    An image that cannot be read is yielded as a ReadFailure."""
+    image_paths = list(image_paths)
+    if not threads:
+        remote = bool(image_paths) and is_remote(image_paths[0])
+        threads = env.S3_MAX_CONNECTIONS if remote else decode_threads()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        pending = deque()
+        for image_path in image_paths:
+            pending.append((pool.submit(read_image, image_path), image_path))
+            if len(pending) > threads * 2:
+                yield _result(*pending.popleft())
+        while pending:
+            yield _result(*pending.popleft())
+
+def is_video(path):
+    return os.path.splitext(path.lower())[1] in VIDEO_EXTENSIONS
+
+def frame_path(video_path, index):
+    return f"{video_path}{FRAME_MARKER}{index}"
+
+def split_frame_path(path):
+    """Return (video_path, frame_index) for a frame path, or (path, None) for anything else."""
+    video_path, marker, index = path.rpartition(FRAME_MARKER)
+    if marker and index.isdigit() and is_video(video_path):
+        return video_path, int(index)
+    return path, None
+
+def frame_signature(img):
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+
+def sample_frames(video_path, stride=None, scene_threshold=None, max_frames=None, should_stop=None):
+    """Yield (frame_index, seconds, frame) for sampled frames of a video, decoding as it
+    goes. Every stride-th frame is a candidate; with scene_threshold a candidate is only
+    kept when its mean difference from the last kept frame, on a 0-1 scale, reaches the
+    threshold. Skipped frames are grabbed but never converted, and only the current
+    frame and a 32x32 signature are held, so memory does not grow with video length.
+    should_stop is checked before every grab, so a cancelled job does not keep scanning
+    a long run of skipped frames; the capture is released as soon as sampling stops or
+    the generator is closed."""
+    stride = stride or env.VIDEO_FRAME_STRIDE
+    max_frames = max_frames or env.VIDEO_MAX_FRAMES
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open video {video_path}")
+    fps = capture.get(cv2.CAP_PROP_FPS)
+    last_signature = None
+    index = -1
+    sampled = 0
+    try:
+        while sampled < max_frames and not (should_stop and should_stop()) and capture.grab():
+            index += 1
+            if index % stride:
+                continue
+            ok, frame = capture.retrieve()
+            if not ok:
+                continue
+            if scene_threshold is not None:
+                signature = frame_signature(frame)
+                if last_signature is not None and np.abs(signature - last_signature).mean() / 255 < scene_threshold:
+                    continue
+                last_signature = signature
+            seconds = index / fps if fps else capture.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            sampled += 1
+            yield index, seconds, frame
+    finally:
+        capture.release()
+
+def read_image(image_path):
+    """Decode an image file, an object store object or an archive member straight from
+    its bytes, or a sampled video frame after seeking to it."""
+    if is_remote(image_path):
+        return cv2.imdecode(np.frombuffer(get_storage(image_path).read(image_path), dtype=np.uint8), cv2.IMREAD_COLOR)
+    archive_path, member = split_member_path(image_path)
+    if member is not None:
+        return cv2.imdecode(np.frombuffer(read_member(archive_path, member), dtype=np.uint8), cv2.IMREAD_COLOR)
+    video_path, index = split_frame_path(image_path)
+    if index is None:
+        return cv2.imread(image_path)
+    capture = cv2.VideoCapture(video_path)
+    try:
+        capture.set(cv2.CAP_PROP_POS_FRAMES, index)
+        ok, frame = capture.read()
+        return frame if ok else None
+    finally:
+        capture.release()
@@ -0,0 +1,88 @@
+import logging
+import os
+import threading
+import cv2
+import data.env as env
+from data.per_process import PerProcess
+
+logger = logging.getLogger(__name__)
+
+_applied = PerProcess()
+_lock = threading.Lock()
+current_budget = None
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def compute_budget(cores=None, workers=None, scheduler_workers=None):
+    """Split the cores of the node between gunicorn workers and, inside each worker,
+    between image decode threads and the framework compute pools. Any value set in
+    the environment (DECODE_THREADS, TORCH_THREADS, TF_INTRA_OP_THREADS,
+    TF_INTER_OP_THREADS, OPENCV_THREADS) overrides the computed one.
+
+    The torch and TensorFlow intra-op pools are process-wide and each call into a model
+    fans out over the whole pool. Calls are serialized per model only, so up to
+    scheduler_workers of them run at once, on any mix of frameworks; each pool is
+    therefore sized to one scheduler worker's share of the compute cores, not to all
+    of them."""
+    cores = cores or available_cores()
+    workers = workers or env.WORKERS
+    scheduler_workers = scheduler_workers or env.SCHEDULER_WORKERS
+    per_worker = max(1, cores // max(1, workers))
+    decode_threads = int(env.DECODE_THREADS or max(1, per_worker // 4))
+    compute_threads = max(1, (per_worker - decode_threads) // max(1, scheduler_workers))
+    return {
+        'cores': cores,
+        'workers': workers,
+        'scheduler_workers': scheduler_workers,
+        'per_worker': per_worker,
+        'decode_threads': decode_threads,
+        'torch_threads': int(env.TORCH_THREADS or compute_threads),
+        'tf_intra_op_threads': int(env.TF_INTRA_OP_THREADS or compute_threads),
+        'tf_inter_op_threads': int(env.TF_INTER_OP_THREADS or 1),
+        # Decode parallelism comes from decode_threads; OpenCV's own pool would only
+        # compete with the frameworks for the same cores.
+        'opencv_threads': int(env.OPENCV_THREADS or 1),
+    }
+
+def apply_thread_budget(budget=None):
+    """Configure torch, TensorFlow and OpenCV thread pools once per process. Runs again
+    in a forked worker because the pid changes."""
+    global current_budget
+    if _applied.done():
+        return current_budget
+    with _lock:
+        if _applied.done():
+            return current_budget
+        budget = budget or compute_budget()
+
+        cv2.setNumThreads(budget['opencv_threads'])
+        try:
+            import torch
+            torch.set_num_threads(budget['torch_threads'])
+            try:
+                torch.set_num_interop_threads(1)
+            except RuntimeError as e:
+                # Only settable before the first inter-op parallel work in the process.
+                logger.warning(f"apply_thread_budget(): torch inter-op pool already started, keeping its size - {e}")
+        except ImportError:
+            pass
+        try:
+            import tensorflow as tf
+            tf.config.threading.set_intra_op_parallelism_threads(budget['tf_intra_op_threads'])
+            tf.config.threading.set_inter_op_parallelism_threads(budget['tf_inter_op_threads'])
+        except ImportError:
+            pass
+        except RuntimeError as e:
+            logger.warning(f"apply_thread_budget(): TensorFlow pools already initialized - {e}")
+
+        current_budget = budget
+        _applied.mark()
+        logger.info(f"apply_thread_budget(): {budget}")
+        return budget
+
+def decode_threads():
+    return (current_budget or compute_budget())['decode_threads']
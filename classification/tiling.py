@@ -0,0 +1,84 @@
+import cv2
+import numpy as np
+import data.env as env
+
+def tile_origins(length, tile_size, stride):
+    if length <= tile_size:
+        return [0]
+    origins = list(range(0, length - tile_size, stride))
+    origins.append(length - tile_size)
+    return origins
+
+def split_tiles(img, tile_size=None, overlap=None, min_variance=None):
+    """Split an image into overlapping square tiles, returning (x0, y0, tile) triples.
+    Tiles whose grayscale variance is below min_variance (sky, water, tarmac) are skipped."""
+    tile_size = tile_size or env.TILE_SIZE
+    overlap = env.TILE_OVERLAP if overlap is None else overlap
+    min_variance = env.TILE_MIN_VARIANCE if min_variance is None else min_variance
+    stride = max(1, int(tile_size * (1 - overlap)))
+
+    h, w = img.shape[:2]
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    tiles = []
+    for y0 in tile_origins(h, tile_size, stride):
+        for x0 in tile_origins(w, tile_size, stride):
+            if min_variance > 0 and gray[y0:y0 + tile_size, x0:x0 + tile_size].var() < min_variance:
+                continue
+            tiles.append((x0, y0, img[y0:y0 + tile_size, x0:x0 + tile_size]))
+    return tiles
+
+def nms(boxes, scores, iou_threshold):
+    """Greedy non-maximum suppression over xyxy boxes, returning the kept indices."""
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        xx1 = np.maximum(x1[i], x1[order[1:]])
+        yy1 = np.maximum(y1[i], y1[order[1:]])
+        xx2 = np.minimum(x2[i], x2[order[1:]])
+        yy2 = np.minimum(y2[i], y2[order[1:]])
+        inter = np.maximum(0, xx2 - xx1) * np.maximum(0, yy2 - yy1)
+        iou = inter / (areas[i] + areas[order[1:]] - inter + 1e-9)
+        order = order[1:][iou <= iou_threshold]
+    return keep
+
+def detect_tiled(detector, img, tile_size=None, overlap=None, min_variance=None, iou_threshold=None, **predict):
+    """Run a YOLO detector over overlapping tiles plus the downscaled full image in a single
+    batch, merge the boxes into full-image coordinates and apply class-wise cross-tile NMS.
+    predict is passed on to the model call (see yolo_filters.predict_args); its max_det
+    bounds every tile, so it is applied again to the merged boxes, highest confidence
+    first. Returns (class_id, (x, y, w, h), confidence) with the same xywh layout as
+    box.xywh."""
+    iou_threshold = env.TILE_NMS_IOU if iou_threshold is None else iou_threshold
+    tiles = split_tiles(img, tile_size, overlap, min_variance)
+    inputs = [img] + [tile for _, _, tile in tiles]
+    offsets = [(0, 0)] + [(x0, y0) for x0, y0, _ in tiles]
+
+    boxes, scores, classes = [], [], []
+    for (x0, y0), result in zip(offsets, detector(inputs, **predict)):
+        if len(result.boxes) == 0:
+            continue
+        xyxy = result.boxes.xyxy.cpu().numpy()
+        xyxy[:, [0, 2]] += x0
+        xyxy[:, [1, 3]] += y0
+        boxes.append(xyxy)
+        scores.append(result.boxes.conf.cpu().numpy())
+        classes.append(result.boxes.cls.cpu().numpy().astype(int))
+
+    if not boxes:
+        return []
+    boxes, scores, classes = np.concatenate(boxes), np.concatenate(scores), np.concatenate(classes)
+
+    merged = []
+    for class_id in np.unique(classes):
+        idx = np.where(classes == class_id)[0]
+        for i in nms(boxes[idx], scores[idx], iou_threshold):
+            x1, y1, x2, y2 = boxes[idx][i]
+            xywh = (int((x1 + x2) / 2), int((y1 + y2) / 2), int(x2 - x1), int(y2 - y1))
+            merged.append((int(class_id), xywh, float(scores[idx][i])))
+    merged.sort(key=lambda detection: detection[2], reverse=True)
+    max_det = predict.get('max_det')
+    return merged[:max_det] if max_det is not None else merged
@@ -0,0 +1,20 @@
+def select_classes(class_map, labels=None):
+    """The {class_id: label} entries of class_map whose label is in labels, ignoring case
+    (all without labels)."""
+    if labels is None:
+        return class_map
+    labels = {label.lower() for label in labels}
+    return {class_id: label for class_id, label in class_map.items() if label.lower() in labels}
+
+def predict_args(class_map, confidence_threshold, iou=None, max_det=None, imgsz=None):
+    """Keyword arguments for a YOLO call that make ultralytics drop other classes and
+    low-confidence boxes inside its own NMS, so only boxes the category keeps are ever
+    materialized as Python objects."""
+    args = {'classes': sorted(class_map), 'conf': confidence_threshold, 'verbose': False}
+    if iou is not None:
+        args['iou'] = iou
+    if max_det is not None:
+        args['max_det'] = max_det
+    if imgsz is not None:
+        args['imgsz'] = imgsz
+    return args
@@ -22,4 +22,59 @@ POSTGRES_DB = Env.get_env("POSTGRES_DB")
 POSTGRES_USER = Env.get_env("POSTGRES_USER")
 POSTGRES_PASSWORD = Env.get_env("POSTGRES_PASSWORD")
 POSTGRES_HOST = Env.get_env("POSTGRES_HOST")
-POSTGRES_PORT = Env.get_env("POSTGRES_PORT")
\ No newline at end of file
+POSTGRES_PORT = Env.get_env("POSTGRES_PORT")
+STATUS_CACHE_SIZE = int(Env.get_env("STATUS_CACHE_SIZE", 10000))
+STATUS_CACHE_TTL = float(Env.get_env("STATUS_CACHE_TTL", 30))
+ANNOTATION_CACHE_BYTES = int(Env.get_env("ANNOTATION_CACHE_BYTES", 64 * 1024 * 1024))
+TILE_SIZE = int(Env.get_env("TILE_SIZE", 640))
+TILE_OVERLAP = float(Env.get_env("TILE_OVERLAP", 0.2))
+TILE_MIN_VARIANCE = float(Env.get_env("TILE_MIN_VARIANCE", 20.0))
+TILE_NMS_IOU = float(Env.get_env("TILE_NMS_IOU", 0.5))
+TILED_CATEGORIES = {c.strip() for c in Env.get_env("TILED_CATEGORIES", "").split(",") if c.strip()}
+WARMUP_CATEGORIES = [c.strip() for c in Env.get_env("WARMUP_CATEGORIES", "animals,food,plants,mountains,sea,cars").split(",") if c.strip()]
+WARMUP_BATCH_SIZES = [int(b) for b in Env.get_env("WARMUP_BATCH_SIZES", "1").split(",") if b.strip()]
+PRELOAD_MODELS = Env.get_env("PRELOAD_MODELS", "0").lower() in ("1", "true", "yes")
+PRELOAD_CATEGORIES = [c.strip() for c in Env.get_env("PRELOAD_CATEGORIES", "animals,food,plants,cars").split(",") if c.strip()]
+WORKERS = int(Env.get_env("WORKERS", 1))
+DECODE_THREADS = Env.get_env("DECODE_THREADS")
+TORCH_THREADS = Env.get_env("TORCH_THREADS")
+TF_INTRA_OP_THREADS = Env.get_env("TF_INTRA_OP_THREADS")
+TF_INTER_OP_THREADS = Env.get_env("TF_INTER_OP_THREADS")
+OPENCV_THREADS = Env.get_env("OPENCV_THREADS")
+SCHEDULER_WORKERS = int(Env.get_env("SCHEDULER_WORKERS", 1))
+SCHEDULER_CHUNK_SIZE = int(Env.get_env("SCHEDULER_CHUNK_SIZE", 16))
+SCHEDULER_INTERACTIVE_WEIGHT = int(Env.get_env("SCHEDULER_INTERACTIVE_WEIGHT", 4))
+MAX_IMAGES = int(Env.get_env("MAX_IMAGES", 50))
+COALESCE_WINDOW_SECONDS = float(Env.get_env("COALESCE_WINDOW_SECONDS", 30))
+HEARTBEAT_SECONDS = float(Env.get_env("HEARTBEAT_SECONDS", 60))
+ORPHAN_TIMEOUT_SECONDS = float(Env.get_env("ORPHAN_TIMEOUT_SECONDS", 300))
+PARTITION_BY_CATEGORY = Env.get_env("PARTITION_BY_CATEGORY", "0").lower() in ("1", "true", "yes")
+PARTITION_CATEGORIES = [c.strip() for c in Env.get_env("PARTITION_CATEGORIES", "animals,food,plants,mountains,sea,cars").split(",") if c.strip()]
+PARTITION_MONTHS_AHEAD = int(Env.get_env("PARTITION_MONTHS_AHEAD", 2))
+PARTITION_MAINTENANCE_SECONDS = float(Env.get_env("PARTITION_MAINTENANCE_SECONDS", 86400))
+DETECTED_OBJECTS_RETENTION_MONTHS = int(Env.get_env("DETECTED_OBJECTS_RETENTION_MONTHS", 0))
+DEDUPE_MAX_DISTANCE = int(Env.get_env("DEDUPE_MAX_DISTANCE", 4))
+DEDUPE_DEFAULT = Env.get_env("DEDUPE_DEFAULT", "0").lower() in ("1", "true", "yes")
+PREFILTER_CATEGORIES = {c.strip() for c in Env.get_env("PREFILTER_CATEGORIES", "").split(",") if c.strip()}
+PREFILTER_SEA_THRESHOLD = float(Env.get_env("PREFILTER_SEA_THRESHOLD", 0.05))
+PREFILTER_MOUNTAINS_THRESHOLD = float(Env.get_env("PREFILTER_MOUNTAINS_THRESHOLD", 0.2))
+TF_JIT_COMPILE = Env.get_env("TF_JIT_COMPILE", "0").lower() in ("1", "true", "yes")
+VIDEO_FRAME_STRIDE = int(Env.get_env("VIDEO_FRAME_STRIDE", 30))
+VIDEO_MAX_FRAMES = int(Env.get_env("VIDEO_MAX_FRAMES", 5000))
+S3_ENDPOINT_URL = Env.get_env("S3_ENDPOINT_URL")
+S3_REGION = Env.get_env("S3_REGION")
+S3_MAX_CONNECTIONS = int(Env.get_env("S3_MAX_CONNECTIONS", 16))
+S3_RANGE_BYTES = int(Env.get_env("S3_RANGE_BYTES", 8 * 1024 * 1024))
+S3_MAX_ATTEMPTS = int(Env.get_env("S3_MAX_ATTEMPTS", 3))
+FAKE_DETECTOR = Env.get_env("FAKE_DETECTOR", "0").lower() in ("1", "true", "yes")
+FAKE_DETECTOR_LATENCY_MS = float(Env.get_env("FAKE_DETECTOR_LATENCY_MS", 20))
+PROFILE_DIR = Env.get_env("PROFILE_DIR", "/tmp/classifier-profiles")
+PROFILE_SAMPLE_INTERVAL_MS = float(Env.get_env("PROFILE_SAMPLE_INTERVAL_MS", 5))
+LOG_FORMAT = Env.get_env("LOG_FORMAT", "json").lower()
+LOG_LEVEL = Env.get_env("LOG_LEVEL", "info")
+LOG_IMAGE_RATE = int(Env.get_env("LOG_IMAGE_RATE", 10))
+EXPORT_CHUNK_BYTES = int(Env.get_env("EXPORT_CHUNK_BYTES", 4 * 1024 * 1024))
+EXPORT_PIPE_CHUNKS = int(Env.get_env("EXPORT_PIPE_CHUNKS", 4))
+DEFAULT_QUALITY_TIER = Env.get_env("DEFAULT_QUALITY_TIER", "balanced")
+# Tiers loaded at warm-up (and preload); any other tier loads on its first request.
+WARMUP_TIERS = [t.strip() for t in Env.get_env("WARMUP_TIERS", DEFAULT_QUALITY_TIER).split(",") if t.strip()]
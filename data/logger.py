@@ -0,0 +1,128 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+import data.env as env
+from data.per_process import PerProcess
+
+# Request context attached to every record logged while it is set, including records
+# from detector modules that never see a req_id themselves.
+_context = contextvars.ContextVar('log_context', default={})
+CONTEXT_FIELDS = ('req_id', 'r_id', 'category')
+
+_setup = PerProcess()
+_listener = None
+
+def bind(**fields):
+    """Set the logging context of the current thread; returns a token for unbind()."""
+    return _context.set({key: value for key, value in fields.items() if value is not None})
+
+def unbind(token):
+    _context.reset(token)
+
+class ContextFilter(logging.Filter):
+    """Copies the bound request context onto the record in the logging thread, before
+    the record crosses the queue."""
+
+    def filter(self, record):
+        for key, value in _context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+class RateLimitFilter(logging.Filter):
+    """Lets at most rate records per second through for each (logger, level). The
+    first record of the next second reports how many were dropped."""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.name, record.levelno)
+        second = int(time.monotonic())
+        dropped = 0
+        with self._lock:
+            window, passed, suppressed = self._windows.get(key, (second, 0, 0))
+            if window != second:
+                window, passed, dropped, suppressed = second, 0, suppressed, 0
+            if passed >= self.rate:
+                self._windows[key] = (window, passed, suppressed + 1)
+                return False
+            self._windows[key] = (window, passed + 1, suppressed)
+        if dropped:
+            record.suppressed = dropped
+        return True
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'pid': record.process,
+            'thread': record.threadName,
+        }
+        for key in CONTEXT_FIELDS + ('suppressed',):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        context = ' '.join(f"{key}={getattr(record, key)}" for key in CONTEXT_FIELDS if getattr(record, key, None))
+        suppressed = getattr(record, 'suppressed', None)
+        if suppressed:
+            line += f" ({suppressed} similar messages suppressed)"
+        return f"{line} [{context}]" if context else line
+
+def setup_logging():
+    """Route all logging through a queue to one listener thread that formats and writes
+    to stdout, so request and inference threads never block on the write or the flush.
+    Runs once per process; a forked worker gets its own queue and listener because the
+    master's listener thread does not survive fork."""
+    global _listener
+    if not _setup.claim():
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(TextFormatter() if env.LOG_FORMAT == 'text' else JsonFormatter())
+    log_queue = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(env.LOG_LEVEL.upper())
+    images = logging.getLogger('classification.images')
+    if not any(isinstance(f, RateLimitFilter) for f in images.filters):
+        images.addFilter(RateLimitFilter(env.LOG_IMAGE_RATE))
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+def stop_logging():
+    """Write out whatever is still queued and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,30 @@
+import os
+import threading
+
+class PerProcess:
+    """Marks one-time setup, such as starting a background thread, as done for the
+    current process. A forked worker inherits the mark but not the threads, so the
+    mark only counts in the process that set it."""
+
+    def __init__(self):
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def done(self):
+        return self._pid == os.getpid()
+
+    def mark(self):
+        self._pid = os.getpid()
+
+    def claim(self):
+        """True for exactly one caller per process, which then does the setup."""
+        if self.done():
+            return False
+        with self._lock:
+            if self.done():
+                return False
+            self.mark()
+            return True
+
+    def reset(self):
+        self._pid = None
@@ -2,4 +2,7 @@ from enum import Enum
 
 class TableNames(Enum):
     DETECTION_REQUEST = "detection_request"
-    DETECTED_OBJECTS = "detected_objects"
\ No newline at end of file
+    DETECTED_OBJECTS = "detected_objects"
+    DETECTION_PROGRESS = "detection_progress"
+    REQUEST_LABEL_COUNTS = "request_label_counts"
+    DAILY_LABEL_COUNTS = "daily_label_counts"
\ No newline at end of file
@@ -0,0 +1,263 @@
+"""Bulk export of detections with COPY ... TO STDOUT, as CSV or Parquet.
+
+    python -m database.export --req-id <req_id> --format parquet --output detections.parquet
+    python -m database.export --since 2024-05-01 --until 2024-06-01 --category cars > cars.csv
+
+Postgres produces the CSV on the server and streams it back in chunks; Parquet is
+converted from that stream one block at a time, so memory stays flat however many rows
+are exported.
+"""
+import argparse
+import logging
+import queue
+import sys
+import threading
+from datetime import datetime
+import data.env as env
+from database.postgres import create_connection
+from data.table_names import TableNames
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ('csv', 'parquet')
+MIMETYPES = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet'}
+COLUMNS = (
+    'id', 'req_id', 'category', 'image_path', 'object_label', 'confidence',
+    'bbox_x', 'bbox_y', 'bbox_w', 'bbox_h', 'frame_index', 'frame_time', 'detected_at',
+)
+
+class Pipe:
+    """A bounded, thread-safe byte stream between one writer and one reader. The writer
+    blocks while EXPORT_PIPE_CHUNKS chunks are waiting, so a slow reader throttles the
+    COPY instead of the export piling up in memory."""
+
+    def __init__(self):
+        self._chunks = queue.Queue(maxsize=env.EXPORT_PIPE_CHUNKS)
+        self._buffer = b''
+        self._error = None
+        self._finished = False
+        self._aborted = threading.Event()
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        while True:
+            if self._aborted.is_set():
+                raise BrokenPipeError("Export reader went away")
+            try:
+                self._chunks.put(bytes(data), timeout=1)
+                return len(data)
+            except queue.Full:
+                continue
+
+    def finish(self, error=None):
+        """Mark the end of the stream; error is raised on the reader side."""
+        self._error = error
+        while not self._aborted.is_set():
+            try:
+                self._chunks.put(None, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def abort(self):
+        """Called by the reader to make the writer's next write() fail."""
+        self._aborted.set()
+
+    def _next_chunk(self):
+        if self._finished:
+            return None
+        chunk = self._chunks.get()
+        if chunk is None:
+            self._finished = True
+            if self._error is not None:
+                raise self._error
+        return chunk
+
+    def __iter__(self):
+        while True:
+            chunk = self._next_chunk()
+            if chunk is None:
+                return
+            yield chunk
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = self._next_chunk()
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    # The rest of the file interface pyarrow uses. The end of the stream is marked by
+    # the producer thread with finish(), never by pyarrow closing its sink, so a failed
+    # conversion cannot look like a complete file to the reader.
+    closed = False
+
+    def close(self):
+        pass
+
+    def flush(self):
+        pass
+
+    def readable(self):
+        return True
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+def export_query(cur, req_id=None, since=None, until=None, category=None, label=None,
+                 min_confidence=None, max_confidence=None):
+    """The SELECT of an export with its filters inlined, since COPY takes no parameters."""
+    conditions, params = [], []
+    for clause, value in (
+        ("req_id = %s", req_id),
+        ("detected_at >= %s", since),
+        ("detected_at < %s", until),
+        ("category = %s", category),
+        ("object_label = %s", label),
+        ("confidence >= %s", min_confidence),
+        ("confidence <= %s", max_confidence),
+    ):
+        if value is not None:
+            conditions.append(clause)
+            params.append(value)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"SELECT {', '.join(COLUMNS)} FROM {TableNames.DETECTED_OBJECTS.value}{where}"
+    return cur.mogrify(query, params).decode()
+
+def copy_csv(out, **filters):
+    """COPY the matching detections as CSV with a header row into out, on a read-only
+    connection that is closed when the export ends."""
+    connection = create_connection()
+    if connection is None:
+        raise Exception("Postgres connection failed")
+    try:
+        connection.set_session(readonly=True)
+        with connection.cursor() as cur:
+            query = export_query(cur, **filters)
+            cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", out, size=env.EXPORT_CHUNK_BYTES)
+        connection.rollback()
+    finally:
+        connection.close()
+
+def parquet_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ('id', pa.int64()),
+        ('req_id', pa.string()),
+        ('category', pa.string()),
+        ('image_path', pa.string()),
+        ('object_label', pa.string()),
+        ('confidence', pa.float64()),
+        ('bbox_x', pa.int32()),
+        ('bbox_y', pa.int32()),
+        ('bbox_w', pa.int32()),
+        ('bbox_h', pa.int32()),
+        ('frame_index', pa.int32()),
+        ('frame_time', pa.float64()),
+        ('detected_at', pa.timestamp('us')),
+    ])
+
+def csv_to_parquet(csv_stream, out):
+    """Convert a CSV export stream to Parquet block by block; every EXPORT_CHUNK_BYTES of
+    CSV becomes one row group."""
+    try:
+        import pyarrow.csv as pa_csv
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("pyarrow is required for Parquet exports. Install it with: pip install pyarrow")
+    schema = parquet_schema()
+    reader = pa_csv.open_csv(
+        csv_stream,
+        read_options=pa_csv.ReadOptions(block_size=env.EXPORT_CHUNK_BYTES),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=schema, strings_can_be_null=True, quoted_strings_can_be_null=False
+        ),
+    )
+    rows = 0
+    with pq.ParquetWriter(out, schema, compression='zstd') as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+def _produce(target, pipe, *args, **kwargs):
+    try:
+        target(*args, **kwargs)
+    except Exception as e:
+        logger.error(f"export: {e}")
+        pipe.finish(e)
+    else:
+        pipe.finish()
+
+def _start(target, pipe, *args, **kwargs):
+    thread = threading.Thread(target=_produce, args=(target, pipe) + args, kwargs=kwargs, name="export", daemon=True)
+    thread.start()
+    return thread
+
+def stream_export(export_format, **filters):
+    """Yield the export as chunks of bytes. The COPY, and for Parquet the conversion, run
+    on background threads; closing the generator early stops them."""
+    csv_pipe = Pipe()
+    pipes = [csv_pipe]
+    _start(copy_csv, csv_pipe, csv_pipe, **filters)
+    output = csv_pipe
+    if export_format == 'parquet':
+        output = Pipe()
+        pipes.append(output)
+        _start(csv_to_parquet, output, csv_pipe, output)
+    try:
+        yield from output
+    finally:
+        for pipe in pipes:
+            pipe.abort()
+
+def export_to_file(path, export_format, **filters):
+    """Write an export to path, or to stdout for '-'."""
+    out = sys.stdout.buffer if path == '-' else open(path, 'wb')
+    try:
+        if export_format == 'csv':
+            copy_csv(out, **filters)
+            return
+        csv_pipe = Pipe()
+        _start(copy_csv, csv_pipe, csv_pipe, **filters)
+        try:
+            rows = csv_to_parquet(csv_pipe, out)
+        finally:
+            csv_pipe.abort()
+        logger.info(f"Exported {rows} detections to {path}")
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--req-id')
+    parser.add_argument('--since', type=datetime.fromisoformat)
+    parser.add_argument('--until', type=datetime.fromisoformat)
+    parser.add_argument('--category')
+    parser.add_argument('--label')
+    parser.add_argument('--min-confidence', type=float)
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+    parser.add_argument('--output', default='-', help="file to write, '-' for stdout")
+    args = parser.parse_args()
+    if args.req_id is None and args.since is None:
+        parser.error("--req-id or --since is required")
+    if args.format == 'parquet' and args.output == '-' and sys.stdout.isatty():
+        parser.error("refusing to write Parquet to a terminal; use --output")
+
+    export_to_file(
+        args.output, args.format, req_id=args.req_id, since=args.since, until=args.until,
+        category=args.category, label=args.label, min_confidence=args.min_confidence,
+    )
+
+if __name__ == "__main__":
+    main()
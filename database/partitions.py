@@ -0,0 +1,235 @@
+import logging
+import datetime
+import re
+import threading
+import time
+import data.env as env
+from database.postgres import create_connection
+from data.per_process import PerProcess
+from data.table_names import TableNames
+
+logger = logging.getLogger(__name__)
+
+DETECTED_OBJECTS = TableNames.DETECTED_OBJECTS.value
+LEGACY_TABLE = f"{DETECTED_OBJECTS}_unpartitioned"
+PARTITION_NAME = re.compile(rf"^{DETECTED_OBJECTS}_(\d{{4}})_(\d{{2}})$")
+# Serializes partition maintenance between workers sharing the database.
+MAINTENANCE_LOCK_ID = 720037
+
+_maintenance = PerProcess()
+
+def month_start(day):
+    return datetime.date(day.year, day.month, 1)
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month):
+    return f"{DETECTED_OBJECTS}_{month:%Y_%m}"
+
+def create_partitioned_table(cur):
+    """detected_objects is range partitioned by detected_at month. The primary key has to
+    contain every partition key, including category for the optional sub-partitions."""
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {DETECTED_OBJECTS} (
+            id BIGSERIAL,
+            req_id VARCHAR(50) REFERENCES {TableNames.DETECTION_REQUEST.value}(req_id),
+            category VARCHAR(20) NOT NULL,
+            image_path TEXT NOT NULL,
+            object_label VARCHAR(50),
+            confidence FLOAT,
+            bbox_x INTEGER,
+            bbox_y INTEGER,
+            bbox_w INTEGER,
+            bbox_h INTEGER,
+            frame_index INTEGER,
+            frame_time FLOAT,
+            detected_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id, category, detected_at)
+        ) PARTITION BY RANGE (detected_at);
+    """)
+    cur.execute(f"CREATE INDEX IF NOT EXISTS {DETECTED_OBJECTS}_req_idx ON {DETECTED_OBJECTS} (req_id, image_path)")
+    # Label search: equality on the label, newest first, confidence read from the index.
+    cur.execute(
+        f"CREATE INDEX IF NOT EXISTS {DETECTED_OBJECTS}_label_idx "
+        f"ON {DETECTED_OBJECTS} (object_label, detected_at DESC, confidence)"
+    )
+    cur.execute(
+        f"CREATE INDEX IF NOT EXISTS {DETECTED_OBJECTS}_category_idx "
+        f"ON {DETECTED_OBJECTS} (category, detected_at DESC, object_label)"
+    )
+
+def create_month_partition(cur, month):
+    """Create the partition for one month, split by category when PARTITION_BY_CATEGORY
+    is set. An existing partition is left as it is."""
+    name = partition_name(month)
+    cur.execute("SELECT to_regclass(%s)", (name,))
+    if cur.fetchone()[0] is not None:
+        return False
+
+    bounds = f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    if not env.PARTITION_BY_CATEGORY:
+        cur.execute(f"CREATE TABLE {name} PARTITION OF {DETECTED_OBJECTS} {bounds}")
+        return True
+
+    cur.execute(f"CREATE TABLE {name} PARTITION OF {DETECTED_OBJECTS} {bounds} PARTITION BY LIST (category)")
+    for category in env.PARTITION_CATEGORIES:
+        cur.execute(f"CREATE TABLE {name}_{category} PARTITION OF {name} FOR VALUES IN (%s)", (category,))
+    cur.execute(f"CREATE TABLE {name}_default PARTITION OF {name} DEFAULT")
+    return True
+
+def ensure_partitions(cur, today=None):
+    """Create partitions from the current month up to PARTITION_MONTHS_AHEAD months ahead."""
+    month = month_start(today or datetime.date.today())
+    for offset in range(env.PARTITION_MONTHS_AHEAD + 1):
+        if create_month_partition(cur, add_months(month, offset)):
+            logger.info(f"Created partition {partition_name(add_months(month, offset))}")
+
+def drop_expired_partitions(cur, today=None, retention_months=None):
+    """Drop whole month partitions older than the retention window. Dropping a partition
+    removes its rows without a DELETE, so nothing is left behind to vacuum."""
+    retention_months = env.DETECTED_OBJECTS_RETENTION_MONTHS if retention_months is None else retention_months
+    if retention_months <= 0:
+        return []
+    cutoff = add_months(month_start(today or datetime.date.today()), -retention_months)
+    cur.execute(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = %s::regclass",
+        (DETECTED_OBJECTS,)
+    )
+    dropped = []
+    for (name,) in cur.fetchall():
+        match = PARTITION_NAME.match(name)
+        if match and datetime.date(int(match.group(1)), int(match.group(2)), 1) < cutoff:
+            cur.execute(f"DROP TABLE {name}")
+            dropped.append(name)
+    if dropped:
+        logger.info(f"Dropped expired partitions: {', '.join(dropped)}")
+    return dropped
+
+def is_unpartitioned(cur):
+    """True while detected_objects is still the plain table of before partitioning."""
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (DETECTED_OBJECTS,))
+    row = cur.fetchone()
+    return row is not None and row[0] == 'r'
+
+def migrate_unpartitioned(cur):
+    """Move an existing heap detected_objects table into the partitioned layout. Rows are
+    copied month by month with their ids and the category of their request, and the old
+    table is dropped, all in the caller's transaction. Writes to detected_objects block
+    until it commits, so this only runs as the explicit one-off step of
+    migrate_partitions, never at startup."""
+    if not is_unpartitioned(cur):
+        return False
+
+    logger.info(f"Migrating {DETECTED_OBJECTS} to a partitioned table...")
+    # Tables from before boxes and video frames were stored lack the copied columns.
+    cur.execute(f"""
+        ALTER TABLE {DETECTED_OBJECTS}
+            ADD COLUMN IF NOT EXISTS bbox_x INTEGER,
+            ADD COLUMN IF NOT EXISTS bbox_y INTEGER,
+            ADD COLUMN IF NOT EXISTS bbox_w INTEGER,
+            ADD COLUMN IF NOT EXISTS bbox_h INTEGER,
+            ADD COLUMN IF NOT EXISTS frame_index INTEGER,
+            ADD COLUMN IF NOT EXISTS frame_time FLOAT
+    """)
+    # The new table reuses the old sequence and primary key names.
+    cur.execute(f"ALTER TABLE {DETECTED_OBJECTS} RENAME TO {LEGACY_TABLE}")
+    cur.execute(f"ALTER TABLE {LEGACY_TABLE} RENAME CONSTRAINT {DETECTED_OBJECTS}_pkey TO {LEGACY_TABLE}_pkey")
+    cur.execute(f"ALTER SEQUENCE IF EXISTS {DETECTED_OBJECTS}_id_seq RENAME TO {LEGACY_TABLE}_id_seq")
+    create_partitioned_table(cur)
+
+    detected_at = "COALESCE(o.detected_at, r.created_at, CURRENT_TIMESTAMP)"
+    source = f"{LEGACY_TABLE} o LEFT JOIN {TableNames.DETECTION_REQUEST.value} r ON r.req_id = o.req_id"
+    cur.execute(f"SELECT MIN({detected_at})::date, MAX({detected_at})::date FROM {source}")
+    first, last = cur.fetchone()
+    if first is not None:
+        month, last = month_start(first), month_start(last)
+        while month <= last:
+            create_month_partition(cur, month)
+            cur.execute(
+                f"INSERT INTO {DETECTED_OBJECTS} "
+                "(id, req_id, category, image_path, object_label, confidence, bbox_x, bbox_y, bbox_w, bbox_h, "
+                "frame_index, frame_time, detected_at) "
+                f"SELECT o.id, o.req_id, COALESCE(r.category, 'unknown'), o.image_path, o.object_label, o.confidence, "
+                f"o.bbox_x, o.bbox_y, o.bbox_w, o.bbox_h, o.frame_index, o.frame_time, {detected_at} FROM {source} "
+                f"WHERE {detected_at} >= %s AND {detected_at} < %s",
+                (month, add_months(month, 1))
+            )
+            logger.info(f"Migrated {cur.rowcount} rows into {partition_name(month)}")
+            month = add_months(month, 1)
+        cur.execute(
+            f"SELECT setval(pg_get_serial_sequence('{DETECTED_OBJECTS}', 'id'), "
+            f"(SELECT MAX(id) FROM {DETECTED_OBJECTS}))"
+        )
+
+    cur.execute(f"DROP TABLE {LEGACY_TABLE}")
+    return True
+
+def maintain_partitions(cur):
+    """Create detected_objects and its upcoming partitions and drop expired ones. The
+    caller commits. A table left from before partitioning is reported, not migrated:
+    see migrate_partitions."""
+    cur.execute("SELECT pg_advisory_xact_lock(%s)", (MAINTENANCE_LOCK_ID,))
+    if is_unpartitioned(cur):
+        logger.error(
+            f"{DETECTED_OBJECTS} is not partitioned; stop the workers and run "
+            "python -m init.initialize --migrate-partitions"
+        )
+        return False
+    create_partitioned_table(cur)
+    ensure_partitions(cur)
+    drop_expired_partitions(cur)
+    return True
+
+def migrate_partitions():
+    """One-off migration of an unpartitioned detected_objects table, on its own
+    connection and in one transaction. Run it with the workers stopped; on a large
+    table it takes as long as copying every row."""
+    postgres = create_connection()
+    if postgres is None:
+        raise Exception("Postgres connection failed")
+    try:
+        with postgres.cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (MAINTENANCE_LOCK_ID,))
+            migrated = migrate_unpartitioned(cur)
+            create_partitioned_table(cur)
+            ensure_partitions(cur)
+        postgres.commit()
+        logger.info(f"{DETECTED_OBJECTS} {'migrated' if migrated else 'was already partitioned'}")
+        return migrated
+    except Exception:
+        postgres.rollback()
+        raise
+    finally:
+        postgres.close()
+
+def run_partition_maintenance():
+    """Run maintain_partitions on a dedicated connection, so its DDL and advisory lock
+    live in a transaction no other code can commit or roll back, and nothing stays
+    connected between the daily runs."""
+    postgres = create_connection()
+    if postgres is None:
+        logger.error("run_partition_maintenance(): Postgres connection failed")
+        return
+    try:
+        with postgres.cursor() as cur:
+            maintain_partitions(cur)
+            postgres.commit()
+    except Exception as e:
+        logger.error(f"run_partition_maintenance(): {e}")
+        postgres.rollback()
+    finally:
+        postgres.close()
+
+def maintain_periodically():
+    while True:
+        time.sleep(env.PARTITION_MAINTENANCE_SECONDS)
+        run_partition_maintenance()
+
+def start_partition_maintenance():
+    """Keep partitions ahead of the clock in a long running worker. Startup maintenance
+    runs from init.initialize."""
+    if not _maintenance.claim():
+        return
+    threading.Thread(target=maintain_periodically, name="partition-maintenance", daemon=True).start()
@@ -1,9 +1,12 @@
+import logging
 import psycopg2
 from psycopg2 import OperationalError
 import data.env as env
-import time
+import os
 import threading
 
+logger = logging.getLogger(__name__)
+
 def create_connection():
     """Create a database connection to the PostgreSQL database."""
     connection = None
@@ -15,30 +18,51 @@ def create_connection():
             host=env.POSTGRES_HOST,
             port=env.POSTGRES_PORT
         )
-        print("Postgres DB connected")
+        logger.info("Postgres DB connected")
     except OperationalError as e:
-        print(f"Connection error: {e}")
+        logger.error(f"Connection error: {e}")
     return connection
 
 def check_connection(connection):
     """Check if the connection is alive, if not, reconnect."""
     try:
         if connection is None or connection.closed != 0:
-            print("Postgres DB connection lost. Reconnecting...")
+            logger.warning("Postgres DB connection lost. Reconnecting...")
             connection = create_connection()
     except Exception as e:
-        print(f"Check connection error: {e}")
+        logger.error(f"Check connection error: {e}")
     return connection
 
+def get_connection():
+    """Return the calling thread's connection, reconnecting if it was lost. Threads never
+    share a connection: psycopg2 transactions belong to the connection, so a commit or
+    rollback in one thread would otherwise commit or discard another thread's
+    half-written checkpoint. Read-only callers use `with postgres:` to end their
+    transaction, so an idle thread does not keep holding locks."""
+    if getattr(_local, 'pid', None) != os.getpid():
+        # A connection inherited through fork belongs to the parent process.
+        _local.connection, _local.pid = None, os.getpid()
+    _local.connection = check_connection(_local.connection)
+    return _local.connection
+
+_local = threading.local()
+
 postgres = create_connection()
 if not postgres:
     raise Exception("Initial PostgreSQL connection failed. Check .env settings.")
+_local.connection, _local.pid = postgres, os.getpid()
 
-def check_connection_periodically():
+def release_for_fork():
+    """Close the connection in the gunicorn master before workers are forked, so no
+    socket is shared between processes."""
     global postgres
-    while True:
-        postgres = check_connection(postgres)
-        time.sleep(60)
+    if postgres is not None and postgres.closed == 0:
+        postgres.close()
+    postgres = None
+    _local.connection = None
 
-thread = threading.Thread(target=check_connection_periodically, daemon=True)
-thread.start()
\ No newline at end of file
+def reset_after_fork():
+    """Open the connection of a newly forked worker's main thread. Every other thread
+    opens its own on first use."""
+    global postgres
+    postgres = get_connection()
@@ -0,0 +1,14 @@
+from database.postgres import get_connection
+from data.table_names import TableNames
+
+def resolve_req_id(req_id):
+    """Return the req_id that owns the results of req_id. Coalesced submissions point at
+    the request they were attached to; every other request owns its own results."""
+    postgres = get_connection()
+    with postgres, postgres.cursor() as cur:
+        cur.execute(
+            f"SELECT COALESCE(coalesced_into, req_id) FROM {TableNames.DETECTION_REQUEST.value} WHERE req_id = %s",
+            (req_id,)
+        )
+        result = cur.fetchone()
+    return result[0] if result else req_id
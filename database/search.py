@@ -0,0 +1,91 @@
+from database.postgres import get_connection
+from data.table_names import TableNames
+
+def search_detections(label=None, category=None, min_confidence=None, max_confidence=None,
+                      since=None, until=None, limit=100, cursor=None):
+    """Detections across requests, newest first. Filters map onto the label and category
+    indexes of detected_objects, and since/until prune its month partitions. cursor is
+    the (detected_at, id) of the last row of the previous page."""
+    conditions, params = [], []
+    for clause, value in (
+        ("object_label = %s", label),
+        ("category = %s", category),
+        ("confidence >= %s", min_confidence),
+        ("confidence <= %s", max_confidence),
+        ("detected_at >= %s", since),
+        ("detected_at < %s", until),
+    ):
+        if value is not None:
+            conditions.append(clause)
+            params.append(value)
+    if cursor is not None:
+        conditions.append("(detected_at, id) < (%s, %s)")
+        params.extend(cursor)
+    where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+
+    postgres = get_connection()
+    with postgres, postgres.cursor() as cur:
+        cur.execute(
+            "SELECT id, req_id, category, image_path, object_label, confidence, "
+            "bbox_x, bbox_y, bbox_w, bbox_h, frame_index, frame_time, detected_at "
+            f"FROM {TableNames.DETECTED_OBJECTS.value} {where}"
+            "ORDER BY detected_at DESC, id DESC LIMIT %s",
+            params + [limit]
+        )
+        rows = cur.fetchall()
+
+    detections = [
+        {
+            'req_id': req_id,
+            'category': category,
+            'image_path': image_path,
+            'label': object_label,
+            'confidence': confidence,
+            'bbox': None if x is None else [x, y, w, h],
+            'frame_index': frame_index,
+            'frame_time': frame_time,
+            'detected_at': detected_at.isoformat(),
+        }
+        for _, req_id, category, image_path, object_label, confidence, x, y, w, h, frame_index, frame_time, detected_at in rows
+    ]
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = {'detected_at': rows[-1][12].isoformat(), 'id': rows[-1][0]}
+    return detections, next_cursor
+
+def request_label_counts(req_id):
+    """Label counts of one request, maintained at write time."""
+    postgres = get_connection()
+    with postgres, postgres.cursor() as cur:
+        cur.execute(
+            f"SELECT object_label, count FROM {TableNames.REQUEST_LABEL_COUNTS.value} "
+            "WHERE req_id = %s ORDER BY count DESC, object_label",
+            (req_id,)
+        )
+        return {label: count for label, count in cur.fetchall()}
+
+def daily_label_counts(since=None, until=None, category=None, label=None):
+    """Per-day label counts, maintained at write time."""
+    conditions, params = [], []
+    for clause, value in (
+        ("day >= %s::date", since),
+        ("day <= %s::date", until),
+        ("category = %s", category),
+        ("object_label = %s", label),
+    ):
+        if value is not None:
+            conditions.append(clause)
+            params.append(value)
+    where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+
+    postgres = get_connection()
+    with postgres, postgres.cursor() as cur:
+        cur.execute(
+            f"SELECT day, category, object_label, count FROM {TableNames.DAILY_LABEL_COUNTS.value} {where}"
+            "ORDER BY day, category, object_label",
+            params
+        )
+        return [
+            {'day': day.isoformat(), 'category': category, 'label': object_label, 'count': count}
+            for day, category, object_label, count in cur.fetchall()
+        ]
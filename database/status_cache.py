@@ -0,0 +1,50 @@
+import threading
+import time
+from collections import OrderedDict
+import data.env as env
+
+class StatusCache:
+    """Bounded, TTL-based req_id -> status cache shared by all threads in the process."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, req_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(req_id)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(req_id)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[req_id]
+            self.misses += 1
+            return None
+
+    def set(self, req_id, status):
+        with self._lock:
+            self._entries[req_id] = (status, time.monotonic() + self.ttl)
+            self._entries.move_to_end(req_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'db_queries_avoided': self.hits,
+            }
+
+status_cache = StatusCache(env.STATUS_CACHE_SIZE, env.STATUS_CACHE_TTL)
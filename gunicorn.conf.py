@@ -0,0 +1,34 @@
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WORKERS', '1'))
+threads = int(os.getenv('THREADS', '1'))
+timeout = int(os.getenv('TIMEOUT', '300'))
+loglevel = os.getenv('LOG_LEVEL', 'info')
+
+# With PRELOAD_APP=1 the app (and the fork-safe model weights, see init/warmup.py) is
+# loaded once in the master and shared copy-on-write by every forked worker.
+preload_app = os.getenv('PRELOAD_APP', '0').lower() in ('1', 'true', 'yes')
+if preload_app:
+    os.environ['PRELOAD_MODELS'] = '1'
+
+def pre_fork(server, worker):
+    if preload_app:
+        import database.postgres
+        database.postgres.release_for_fork()
+
+def post_fork(server, worker):
+    # The master's log listener thread does not survive fork; give the worker its own.
+    from data.logger import setup_logging
+    setup_logging()
+    if preload_app:
+        import database.postgres
+        from classification.recovery import start_orphan_monitor
+        from classification.thread_budget import apply_thread_budget
+        from database.partitions import start_partition_maintenance
+        from init.warmup import start_warmup
+        database.postgres.reset_after_fork()
+        apply_thread_budget()
+        start_warmup()
+        start_orphan_monitor()
+        start_partition_maintenance()
@@ -1,6 +1,11 @@
+import argparse
+import logging
 from database.postgres import postgres, check_connection
+from database.partitions import maintain_partitions, migrate_partitions
 from data.table_names import TableNames
 
+logger = logging.getLogger(__name__)
+
 def create_tables():
     """Creates necessary database tables for classification."""
     queries = {
@@ -10,38 +15,111 @@ def create_tables():
             r_id VARCHAR(50),
             category VARCHAR(20),
             status VARCHAR(20) DEFAULT 'pending',
+            coalesced_into VARCHAR(50),
+            abs_path TEXT,
+            options JSONB,
+            processed_images INTEGER DEFAULT 0,
+            skipped_duplicates INTEGER DEFAULT 0,
+            tier VARCHAR(20),
+            heartbeat_at TIMESTAMP,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         );
         """,
-        TableNames.DETECTED_OBJECTS.value: """
-        CREATE TABLE IF NOT EXISTS detected_objects (
-            id SERIAL PRIMARY KEY,
+        TableNames.DETECTION_PROGRESS.value: """
+        CREATE TABLE IF NOT EXISTS detection_progress (
             req_id VARCHAR(50) REFERENCES detection_request(req_id),
             image_path TEXT NOT NULL,
-            object_label VARCHAR(50),
-            confidence FLOAT,
-            detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (req_id, image_path)
+        );
+        """,
+        TableNames.REQUEST_LABEL_COUNTS.value: """
+        CREATE TABLE IF NOT EXISTS request_label_counts (
+            req_id VARCHAR(50) REFERENCES detection_request(req_id),
+            object_label VARCHAR(50) NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (req_id, object_label)
+        );
+        """,
+        TableNames.DAILY_LABEL_COUNTS.value: """
+        CREATE TABLE IF NOT EXISTS daily_label_counts (
+            day DATE NOT NULL,
+            category VARCHAR(20) NOT NULL,
+            object_label VARCHAR(50) NOT NULL,
+            count BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, category, object_label)
         );
         """
     }
 
+    migrations = [
+        """
+        ALTER TABLE detection_request
+            ADD COLUMN IF NOT EXISTS coalesced_into VARCHAR(50),
+            ADD COLUMN IF NOT EXISTS abs_path TEXT,
+            ADD COLUMN IF NOT EXISTS options JSONB,
+            ADD COLUMN IF NOT EXISTS processed_images INTEGER DEFAULT 0,
+            ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP,
+            ADD COLUMN IF NOT EXISTS skipped_duplicates INTEGER DEFAULT 0,
+            ADD COLUMN IF NOT EXISTS tier VARCHAR(20);
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS detection_request_active_idx
+            ON detection_request (heartbeat_at)
+            WHERE status IN ('queued', 'processing', 'cancelling');
+        """,
+    ]
+
+    # Fill the count tables from existing detections the first time they are created.
+    # The NOT EXISTS check is evaluated once, so later startups skip the scan.
+    backfills = [
+        """
+        INSERT INTO request_label_counts (req_id, object_label, count)
+        SELECT req_id, object_label, COUNT(*) FROM detected_objects
+        WHERE req_id IS NOT NULL AND object_label IS NOT NULL
+            AND NOT EXISTS (SELECT 1 FROM request_label_counts)
+        GROUP BY req_id, object_label;
+        """,
+        """
+        INSERT INTO daily_label_counts (day, category, object_label, count)
+        SELECT detected_at::date, category, object_label, COUNT(*) FROM detected_objects
+        WHERE object_label IS NOT NULL
+            AND NOT EXISTS (SELECT 1 FROM daily_label_counts)
+        GROUP BY detected_at::date, category, object_label;
+        """,
+    ]
+
     global postgres
     postgres = check_connection(postgres)
     try:
         with postgres.cursor() as cur:
             for table, query in queries.items():
-                print(f"Creating table {table}...")
+                logger.info(f"Creating table {table}...")
+                cur.execute(query)
+            for query in migrations:
+                cur.execute(query)
+            logger.info(f"Creating partitioned table {TableNames.DETECTED_OBJECTS.value}...")
+            maintain_partitions(cur)
+            for query in backfills:
                 cur.execute(query)
             postgres.commit()
-        print("All tables created successfully.")
+        logger.info("All tables created successfully.")
     except Exception as e:
-        print(f"Error creating tables: {e}")
+        logger.error(f"Error creating tables: {e}")
 
 def initialize():
     """Runs all initialization functions."""
-    print("Initializing database and system setup for classification...")
+    logger.info("Initializing database and system setup for classification...")
     create_tables()
-    print("Initialization complete.")
+    logger.info("Initialization complete.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create or upgrade the classification tables.")
+    parser.add_argument(
+        '--migrate-partitions', action='store_true',
+        help="move a detected_objects table from before partitioning into monthly partitions",
+    )
+    args = parser.parse_args()
+    if args.migrate_partitions:
+        migrate_partitions()
     initialize()
\ No newline at end of file
@@ -0,0 +1,103 @@
+import logging
+import threading
+import time
+import data.env as env
+from classification.registry import CATEGORIES, get_detector, run_dummy_batch
+
+logger = logging.getLogger(__name__)
+
+warmup_state = {
+    'ready': False,
+    'started_at': None,
+    'finished_at': None,
+    'models': {},
+}
+_state_lock = threading.Lock()
+
+def warm_up_category(category, batch_sizes, tier=None):
+    """Load a category's model at a tier and run one dummy forward pass per batch size."""
+    model = {'loaded': False, 'load_seconds': None, 'warmup_seconds': {}, 'error': None}
+    try:
+        start_time = time.time()
+        detector = get_detector(category, tier)
+        model['load_seconds'] = round(time.time() - start_time, 3)
+        if detector is None:
+            raise Exception(f"Detector for {category} could not be initialized")
+        model['loaded'] = True
+
+        for batch_size in batch_sizes:
+            start_time = time.time()
+            run_dummy_batch(category, detector, batch_size, tier)
+            model['warmup_seconds'][str(batch_size)] = round(time.time() - start_time, 3)
+    except Exception as e:
+        logger.error(f"warm_up_category(): {category} - {e}")
+        model['error'] = str(e)
+    return model
+
+def model_name(category, tier):
+    """Readiness key of a warmed-up model: the category for the default tier, as before
+    tiers existed, otherwise category:tier."""
+    return category if tier == env.DEFAULT_QUALITY_TIER else f"{category}:{tier}"
+
+def warm_up(categories=None, batch_sizes=None, tiers=None):
+    """Preload and exercise the configured models at each of WARMUP_TIERS, then mark the
+    process ready. Tiers not listed load on their first request."""
+    categories = categories or env.WARMUP_CATEGORIES
+    batch_sizes = batch_sizes or env.WARMUP_BATCH_SIZES
+    tiers = tiers or env.WARMUP_TIERS
+    with _state_lock:
+        warmup_state['ready'] = False
+        warmup_state['started_at'] = time.time()
+
+    logger.info(f"Warming up models for {', '.join(categories)}...")
+    for category in categories:
+        if category not in CATEGORIES:
+            logger.warning(f"warm_up(): Skipping unknown category {category}")
+            continue
+        for tier in tiers:
+            if tier not in CATEGORIES[category]['tiers']:
+                logger.warning(f"warm_up(): Skipping unknown tier {tier}")
+                continue
+            model = warm_up_category(category, batch_sizes, tier)
+            with _state_lock:
+                warmup_state['models'][model_name(category, tier)] = model
+
+    with _state_lock:
+        warmup_state['finished_at'] = time.time()
+        warmup_state['ready'] = all(model['loaded'] for model in warmup_state['models'].values())
+    logger.info(f"Warm-up complete, ready={warmup_state['ready']}")
+
+def preload_models(categories=None):
+    """Load model weights without running them. Used in the gunicorn master with
+    preload_app so forked workers share the weights copy-on-write. No forward pass runs
+    here, and no thread budget is applied, because framework thread pools created
+    before fork are not safe to inherit; each worker applies its own in post_fork."""
+    categories = categories or env.PRELOAD_CATEGORIES
+    logger.info(f"Preloading model weights for {', '.join(categories)}...")
+    for category in categories:
+        if category not in CATEGORIES:
+            logger.warning(f"preload_models(): Skipping unknown category {category}")
+            continue
+        if CATEGORIES[category]['backend'] != 'yolo':
+            logger.warning(f"preload_models(): Skipping {category}, its backend is not fork-safe once loaded")
+            continue
+        for tier in env.WARMUP_TIERS:
+            if tier not in CATEGORIES[category]['tiers']:
+                continue
+            start_time = time.time()
+            get_detector(category, tier, configure_threads=False)
+            logger.info(f"preload_models(): {model_name(category, tier)} loaded in {time.time() - start_time:.2f} seconds")
+
+def start_warmup():
+    thread = threading.Thread(target=warm_up, daemon=True)
+    thread.start()
+    return thread
+
+def readiness():
+    with _state_lock:
+        return {
+            'ready': warmup_state['ready'],
+            'started_at': warmup_state['started_at'],
+            'finished_at': warmup_state['finished_at'],
+            'models': {category: dict(model) for category, model in warmup_state['models'].items()},
+        }
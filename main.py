@@ -1,8 +1,17 @@
-from flask import Flask
+from data.logger import setup_logging
+# Before the other imports: database.postgres connects, and logs, at import time.
+setup_logging()
+
+from flask import Flask, jsonify
 from routes.api_routes import apiRoutes
 from data.env import POSTGRES_DB, POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT
 import database.postgres
 from init.initialize import initialize
+from init.warmup import preload_models, readiness, start_warmup
+from classification.recovery import start_orphan_monitor
+from classification.thread_budget import apply_thread_budget
+from database.partitions import start_partition_maintenance
+import data.env as env
 
 app = Flask(__name__)
 app.register_blueprint(apiRoutes, url_prefix="/api/v1")
@@ -11,7 +20,21 @@ app.register_blueprint(apiRoutes, url_prefix="/api/v1")
 def home():
     return "Classifier Server is running!"
 
+@app.route('/health/ready')
+def ready():
+    state = readiness()
+    return jsonify(state), 200 if state['ready'] else 503
+
 initialize()
+if env.PRELOAD_MODELS:
+    # Running in the gunicorn master; workers warm up in post_fork (see gunicorn.conf.py).
+    preload_models()
+else:
+    # Before any thread can run a model, so every framework pool is still settable.
+    apply_thread_budget()
+    start_warmup()
+    start_orphan_monitor()
+    start_partition_maintenance()
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8000, debug=True)
\ No newline at end of file
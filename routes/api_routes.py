@@ -1,6 +1,13 @@
-from flask import Blueprint, request, jsonify
+import logging
+from flask import Blueprint, Response, request, jsonify, send_file
 import asyncio
-from database.postgres import postgres, check_connection
+from datetime import datetime
+import data.env as env
+from database.postgres import get_connection
+from database.status_cache import status_cache
+from database.queries import resolve_req_id
+from database.search import daily_label_counts, request_label_counts, search_detections
+from database.export import EXPORT_FORMATS, MIMETYPES, stream_export
 from data.err_msgs import ErrorMessages
 from classification.animals.start_detection import start_detection as detect_animals
 from classification.food.start_detection import start_detection as detect_food
@@ -8,8 +15,18 @@ from classification.plants.start_detection import start_detection as detect_plan
 from classification.mountains.start_detection import start_detection as detect_mountains
 from classification.sea.start_detection import start_detection as detect_sea
 from classification.cars.start_detection import start_detection as detect_cars
+from classification.pipeline import cancel_request, run_batch_detection
+from classification.recovery import resume_request
+from classification.annotate import annotation_cache, render_annotated
+from classification.registry import CATEGORIES, IOU_RANGE, QUALITY_TIERS, YOLO_OPTIONS
+from classification.coalescing import inflight
+from classification import prefilter
+from classification.profiling import PROFILE_MODES, find_profile, global_profiling, set_global_profiling
+from classification.scheduler import PRIORITIES, PRIORITY_BULK, PRIORITY_INTERACTIVE, scheduler
 from data.table_names import TableNames
 
+logger = logging.getLogger(__name__)
+
 apiRoutes = Blueprint('apiRoutes', __name__)
 
 CATEGORY_HANDLERS = {
@@ -21,6 +38,171 @@ CATEGORY_HANDLERS = {
     'cars': detect_cars
 }
 
+MAX_BATCH_ITEMS = 500
+MAX_DEADLINE_SECONDS = 24 * 60 * 60
+MAX_SEARCH_LIMIT = 1000
+
+def validate_item(data):
+    """Return an error message for an invalid {r_id, abs_path, category} item, or None."""
+    r_id = data.get('r_id')
+    abs_path = data.get('abs_path')
+    category = data.get('category')
+
+    if not r_id or not abs_path or not category:
+        return "r_id, abs_path, and category are required"
+
+    if not isinstance(r_id, str) or not isinstance(abs_path, str) or not isinstance(category, str):
+        return "r_id, abs_path, and category must be strings"
+
+    if category not in CATEGORY_HANDLERS:
+        return f"Invalid category: {category}. Supported: {', '.join(CATEGORY_HANDLERS.keys())}"
+
+    tiled = data.get('tiled')
+    if tiled is not None:
+        if not isinstance(tiled, bool):
+            return "tiled must be a boolean"
+        if tiled and 'tiled' not in CATEGORIES[category]['options']:
+            return f"Tiled inference is not supported for {category}"
+
+    prefilter = data.get('prefilter')
+    if prefilter is not None:
+        if not isinstance(prefilter, bool):
+            return "prefilter must be a boolean"
+        if prefilter and 'prefilter' not in CATEGORIES[category]['options']:
+            return f"Scene pre-filtering is not supported for {category}"
+
+    tier = data.get('tier')
+    if tier is not None and (not isinstance(tier, str) or tier not in CATEGORIES[category]['tiers']):
+        return f"tier must be one of: {', '.join(QUALITY_TIERS)}"
+
+    msg = validate_model_filters(data, category)
+    if msg:
+        return msg
+
+    dedupe = data.get('dedupe')
+    if dedupe is not None and not isinstance(dedupe, bool):
+        return "dedupe must be a boolean"
+
+    profile = data.get('profile')
+    if profile is not None and not isinstance(profile, bool) and profile not in PROFILE_MODES:
+        return f"profile must be a boolean or one of: {', '.join(PROFILE_MODES)}"
+
+    frame_stride = data.get('frame_stride')
+    if frame_stride is not None:
+        if isinstance(frame_stride, bool) or not isinstance(frame_stride, int) or frame_stride < 1:
+            return "frame_stride must be a positive integer"
+
+    scene_threshold = data.get('scene_threshold')
+    if scene_threshold is not None:
+        if isinstance(scene_threshold, bool) or not isinstance(scene_threshold, (int, float)) or not 0 <= scene_threshold <= 1:
+            return "scene_threshold must be a number between 0 and 1"
+
+    deadline_seconds = data.get('deadline_seconds')
+    if deadline_seconds is not None:
+        if isinstance(deadline_seconds, bool) or not isinstance(deadline_seconds, (int, float)):
+            return "deadline_seconds must be a number"
+        if not 0 < deadline_seconds <= MAX_DEADLINE_SECONDS:
+            return f"deadline_seconds must be between 0 and {MAX_DEADLINE_SECONDS}"
+    return None
+
+def validate_model_filters(data, category):
+    """Return an error message for classes, confidence, iou or max_det outside the
+    category's limits, or None."""
+    spec = CATEGORIES[category]
+    for key in YOLO_OPTIONS:
+        if data.get(key) is not None and key not in spec['options']:
+            return f"{key} is not supported for {category}"
+
+    classes = data.get('classes')
+    if classes is not None:
+        if not isinstance(classes, list) or not classes or not all(isinstance(label, str) for label in classes):
+            return "classes must be a non-empty list of labels"
+        supported = {label.lower() for label in spec['labels']}
+        unknown = [label for label in classes if label.lower() not in supported]
+        if unknown:
+            return f"Unknown classes for {category}: {', '.join(unknown)}. Supported: {', '.join(sorted(spec['labels']))}"
+
+    confidence = data.get('confidence')
+    if confidence is not None:
+        min_confidence = spec['limits']['min_confidence']
+        if isinstance(confidence, bool) or not isinstance(confidence, (int, float)) or not min_confidence <= confidence <= 1:
+            return f"confidence must be a number between {min_confidence} and 1 for {category}"
+
+    iou = data.get('iou')
+    if iou is not None:
+        if isinstance(iou, bool) or not isinstance(iou, (int, float)) or not IOU_RANGE[0] <= iou <= IOU_RANGE[1]:
+            return f"iou must be a number between {IOU_RANGE[0]} and {IOU_RANGE[1]}"
+
+    max_det = data.get('max_det')
+    if max_det is not None:
+        limit = spec['limits']['max_det']
+        if isinstance(max_det, bool) or not isinstance(max_det, int) or not 1 <= max_det <= limit:
+            return f"max_det must be an integer between 1 and {limit} for {category}"
+    return None
+
+def validate_scheduling(data):
+    """Return an error message for an invalid priority or wait field, or None."""
+    priority = data.get('priority')
+    wait = data.get('wait')
+    if priority is not None and priority not in PRIORITIES:
+        return f"priority must be one of: {', '.join(PRIORITIES)}"
+    if wait is not None and not isinstance(wait, bool):
+        return "wait must be a boolean"
+    return None
+
+def parse_scheduling(data, default_priority):
+    return {'priority': data.get('priority') or default_priority, 'wait': data.get('wait', True)}
+
+def parse_search(data):
+    """Return (filters, error message) for the body of a detection search or summary."""
+    filters = {}
+    for field in ('label', 'category'):
+        value = data.get(field)
+        if value is not None and not isinstance(value, str):
+            return None, f"{field} must be a string"
+        filters[field] = value
+    if filters['category'] is not None and filters['category'] not in CATEGORIES:
+        return None, f"Invalid category: {filters['category']}. Supported: {', '.join(CATEGORIES)}"
+
+    for field in ('min_confidence', 'max_confidence'):
+        value = data.get(field)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 1):
+            return None, f"{field} must be a number between 0 and 1"
+        filters[field] = value
+
+    for field in ('since', 'until'):
+        value = data.get(field)
+        if value is not None:
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                return None, f"{field} must be an ISO 8601 timestamp"
+        filters[field] = value
+    return filters, None
+
+def parse_options(data):
+    """Collect the optional per-request detection settings of a validated item."""
+    options = {}
+    if data.get('tiled') is not None:
+        options['tiled'] = data['tiled']
+    elif data['category'] in env.TILED_CATEGORIES:
+        options['tiled'] = True
+    if data.get('prefilter') is not None:
+        options['prefilter'] = data['prefilter']
+    elif data['category'] in env.PREFILTER_CATEGORIES:
+        options['prefilter'] = True
+    options['tier'] = data.get('tier') or env.DEFAULT_QUALITY_TIER
+    if data.get('dedupe', env.DEDUPE_DEFAULT):
+        options['dedupe'] = True
+    if data.get('profile'):
+        options['profile'] = data['profile']
+    for key in ('frame_stride', 'scene_threshold', 'deadline_seconds', 'confidence', 'iou', 'max_det'):
+        if data.get(key) is not None:
+            options[key] = data[key]
+    if data.get('classes') is not None:
+        options['classes'] = tuple(sorted(set(data['classes'])))
+    return options
+
 @apiRoutes.route('/process/start', methods=['POST'])
 def start_process_route():
     success = False
@@ -29,33 +211,78 @@ def start_process_route():
 
     try:
         data = request.get_json()
-        r_id = data.get('r_id')
-        abs_path = data.get('abs_path')
-        category = data.get('category')
-
-        if not r_id or not abs_path or not category:
-            msg = "r_id, abs_path, and category are required"
-            raise ValueError(msg)
-        
-        if not isinstance(r_id, str) or not isinstance(abs_path, str) or not isinstance(category, str):
-            msg = "r_id, abs_path, and category must be strings"
+        msg = validate_item(data) or validate_scheduling(data)
+        if msg:
             raise ValueError(msg)
 
-        if category not in CATEGORY_HANDLERS:
-            msg = f"Invalid category: {category}. Supported: {', '.join(CATEGORY_HANDLERS.keys())}"
-            raise ValueError(msg)
+        r_id = data['r_id']
+        abs_path = data['abs_path']
+        category = data['category']
+        scheduling = parse_scheduling(data, PRIORITY_INTERACTIVE)
 
         handler = CATEGORY_HANDLERS[category]
-        process_result = asyncio.run(handler(r_id, abs_path))
+        process_result = asyncio.run(handler(r_id, abs_path, parse_options(data), **scheduling))
         req_id = process_result['req_id']
         success = process_result['success']
         msg = process_result['msg']
     except Exception as e:
-        print(f"start_process_route(): {e}")
+        logger.warning(f"start_process_route(): {e}")
         msg = msg or ErrorMessages.GENERIC_ERROR.value
         return jsonify({"success": success, "msg": msg, "req_id": req_id}), 400
     return jsonify({"success": success, "msg": msg, "req_id": req_id}), 200
 
+@apiRoutes.route('/process/batch', methods=['POST'])
+def batch_process_route():
+    success = False
+    msg = ""
+    results = []
+
+    try:
+        data = request.get_json()
+        items = data.get('items')
+
+        if not items or not isinstance(items, list):
+            msg = "items is required and must be a non-empty list"
+            raise ValueError(msg)
+
+        if len(items) > MAX_BATCH_ITEMS:
+            msg = f"A batch may contain at most {MAX_BATCH_ITEMS} items"
+            raise ValueError(msg)
+
+        msg = validate_scheduling(data)
+        if msg:
+            raise ValueError(msg)
+        scheduling = parse_scheduling(data, PRIORITY_BULK)
+
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                msg = f"items[{index}] must be an object"
+                raise ValueError(msg)
+            item_msg = validate_item(item)
+            if item_msg:
+                msg = f"items[{index}]: {item_msg}"
+                raise ValueError(msg)
+
+        batch = [
+            {'r_id': item['r_id'], 'abs_path': item['abs_path'], 'category': item['category'], 'options': parse_options(item)}
+            for item in items
+        ]
+        process_results = asyncio.run(run_batch_detection(batch, **scheduling))
+        for item, result in zip(batch, process_results):
+            results.append({'r_id': item['r_id'], 'abs_path': item['abs_path'], 'category': item['category'], **result})
+
+        success = any(result['success'] for result in results)
+        completed = sum(1 for result in results if result['success'])
+        if scheduling['wait']:
+            msg = f"{completed} of {len(results)} requests completed successfully"
+        else:
+            msg = f"{completed} of {len(results)} requests queued"
+    except Exception as e:
+        logger.warning(f"batch_process_route(): {e}")
+        msg = msg or ErrorMessages.GENERIC_ERROR.value
+        return jsonify({"success": success, "msg": msg, "results": results}), 400
+    return jsonify({"success": success, "msg": msg, "results": results}), 200
+
 @apiRoutes.route('/process/status', methods=['POST'])
 def status_process_route():
     success = False
@@ -70,22 +297,240 @@ def status_process_route():
             msg = "req_id is required and must be a string"
             raise ValueError(msg)
 
-        global postgres
-        postgres = check_connection(postgres)
-        with postgres.cursor() as cur:
-            cur.execute(
-                f"SELECT status FROM {TableNames.DETECTION_REQUEST.value} WHERE req_id = %s",
-                (req_id,)
-            )
-            result = cur.fetchone()
+        cached_status = status_cache.get(req_id)
+        if cached_status is not None:
+            status = cached_status
+            success = True
+            msg = f"Status for {req_id} retrieved"
+        else:
+            postgres = get_connection()
+            with postgres, postgres.cursor() as cur:
+                cur.execute(
+                    f"SELECT COALESCE(p.status, r.status) FROM {TableNames.DETECTION_REQUEST.value} r "
+                    f"LEFT JOIN {TableNames.DETECTION_REQUEST.value} p ON p.req_id = r.coalesced_into "
+                    "WHERE r.req_id = %s",
+                    (req_id,)
+                )
+                result = cur.fetchone()
             if result:
                 status = result[0]
+                status_cache.set(req_id, status)
                 success = True
                 msg = f"Status for {req_id} retrieved"
             else:
                 msg = f"Process {req_id} not found"
     except Exception as e:
-        print(f"status_process_route(): {e}")
+        logger.warning(f"status_process_route(): {e}")
         msg = msg or ErrorMessages.GENERIC_ERROR.value
         return jsonify({"success": success, "msg": msg, "status": status}), 400
-    return jsonify({"success": success, "msg": msg, "status": status}), 200
\ No newline at end of file
+    return jsonify({"success": success, "msg": msg, "status": status}), 200
+
+@apiRoutes.route('/process/cancel', methods=['POST'])
+def cancel_process_route():
+    success = False
+    msg = ""
+
+    try:
+        data = request.get_json()
+        req_id = data.get('req_id')
+
+        if not req_id or not isinstance(req_id, str):
+            msg = "req_id is required and must be a string"
+            raise ValueError(msg)
+
+        success, msg = cancel_request(req_id)
+    except Exception as e:
+        logger.warning(f"cancel_process_route(): {e}")
+        msg = msg or ErrorMessages.GENERIC_ERROR.value
+        return jsonify({"success": success, "msg": msg}), 400
+    return jsonify({"success": success, "msg": msg}), 200
+
+@apiRoutes.route('/process/resume', methods=['POST'])
+def resume_process_route():
+    success = False
+    msg = ""
+
+    try:
+        data = request.get_json()
+        req_id = data.get('req_id')
+
+        if not req_id or not isinstance(req_id, str):
+            msg = "req_id is required and must be a string"
+            raise ValueError(msg)
+
+        success, msg = resume_request(req_id)
+    except Exception as e:
+        logger.warning(f"resume_process_route(): {e}")
+        msg = msg or ErrorMessages.GENERIC_ERROR.value
+        return jsonify({"success": success, "msg": msg}), 400
+    return jsonify({"success": success, "msg": msg}), 200
+
+@apiRoutes.route('/process/annotated/<req_id>/<path:image>', methods=['GET'])
+def annotated_image_route(req_id, image):
+    msg = ""
+
+    try:
+        data = render_annotated(req_id, image)
+        if data is None:
+            msg = f"No detections for {image} in {req_id}"
+            return jsonify({"success": False, "msg": msg}), 404
+    except Exception as e:
+        logger.warning(f"annotated_image_route(): {e}")
+        msg = msg or ErrorMessages.GENERIC_ERROR.value
+        return jsonify({"success": False, "msg": msg}), 400
+    return Response(data, mimetype="image/jpeg")
+
+@apiRoutes.route('/process/profile/<req_id>', methods=['GET'])
+def profile_route(req_id):
+    """Download a request's profile: collapsed stacks (.folded) for flamegraph.pl or
+    speedscope, or pstats data (.prof) for snakeviz."""
+    msg = ""
+
+    try:
+        path = find_profile(req_id) or find_profile(resolve_req_id(req_id))
+        if path is None:
+            msg = f"No profile for {req_id}"
+            return jsonify({"success": False, "msg": msg}), 404
+    except Exception as e:
+        logger.warning(f"profile_route(): {e}")
+        msg = msg or ErrorMessages.GENERIC_ERROR.value
+        return jsonify({"success": False, "msg": msg}), 400
+    return send_file(path, as_attachment=True, download_name=f"{req_id}{path[path.rindex('.'):]}")
+
+@apiRoutes.route('/admin/profiling', methods=['GET', 'POST'])
+def admin_profiling_route():
+    """Switch profiling on or off for every new request: {enabled, mode}."""
+    success = False
+    msg = ""
+
+    try:
+        if request.method == 'POST':
+            data = request.get_json()
+            enabled = data.get('enabled')
+            mode = data.get('mode', 'sampling')
+            if not isinstance(enabled, bool):
+                msg = "enabled is required and must be a boolean"
+                raise ValueError(msg)
+            if mode not in PROFILE_MODES:
+                msg = f"mode must be one of: {', '.join(PROFILE_MODES)}"
+                raise ValueError(msg)
+            set_global_profiling(enabled, mode)
+        mode = global_profiling()
+        success = True
+        msg = f"Profiling {'enabled (' + mode + ')' if mode else 'disabled'} for new requests"
+    except Exception as e:
+        logger.warning(f"admin_profiling_route(): {e}")
+        msg = msg or ErrorMessages.GENERIC_ERROR.value
+        return jsonify({"success": success, "msg": msg}), 400
+    return jsonify({"success": success, "msg": msg, "mode": mode}), 200
+
+@apiRoutes.route('/metrics', methods=['GET'])
+def metrics_route():
+    return jsonify({
+        "status_cache": status_cache.metrics(),
+        "annotation_cache": annotation_cache.metrics(),
+        "scheduler": scheduler.metrics(),
+        "coalescing": inflight.metrics(),
+        "prefilter": prefilter.metrics(),
+    }), 200
+
+@apiRoutes.route('/detections/search', methods=['POST'])
+def search_detections_route():
+    success = False
+    msg = ""
+    detections = []
+    next_cursor = None
+
+    try:
+        data = request.get_json()
+        filters, msg = parse_search(data)
+        if msg:
+            raise ValueError(msg)
+
+        limit = data.get('limit', 100)
+        if isinstance(limit, bool) or not isinstance(limit, int) or not 0 < limit <= MAX_SEARCH_LIMIT:
+            msg = f"limit must be an integer between 1 and {MAX_SEARCH_LIMIT}"
+            raise ValueError(msg)
+
+        cursor = data.get('cursor')
+        if cursor is not None:
+            try:
+                cursor = (datetime.fromisoformat(cursor['detected_at']), int(cursor['id']))
+            except (KeyError, TypeError, ValueError):
+                msg = "cursor must be the next_cursor of a previous search"
+                raise ValueError(msg)
+
+        detections, next_cursor = search_detections(limit=limit, cursor=cursor, **filters)
+        success = True
+        msg = f"Found {len(detections)} detections"
+    except Exception as e:
+        logger.warning(f"search_detections_route(): {e}")
+        msg = msg or ErrorMessages.GENERIC_ERROR.value
+        return jsonify({"success": success, "msg": msg, "detections": detections, "next_cursor": next_cursor}), 400
+    return jsonify({"success": success, "msg": msg, "detections": detections, "next_cursor": next_cursor}), 200
+
+@apiRoutes.route('/detections/counts', methods=['POST'])
+def detection_counts_route():
+    """Label counts of one request ({req_id}) or per day ({since, until, category, label})."""
+    success = False
+    msg = ""
+    counts = None
+
+    try:
+        data = request.get_json()
+        req_id = data.get('req_id')
+        if req_id is not None:
+            if not isinstance(req_id, str):
+                msg = "req_id must be a string"
+                raise ValueError(msg)
+            counts = request_label_counts(resolve_req_id(req_id))
+        else:
+            filters, msg = parse_search(data)
+            if msg:
+                raise ValueError(msg)
+            counts = daily_label_counts(filters['since'], filters['until'], filters['category'], filters['label'])
+        success = True
+        msg = "Label counts retrieved"
+    except Exception as e:
+        logger.warning(f"detection_counts_route(): {e}")
+        msg = msg or ErrorMessages.GENERIC_ERROR.value
+        return jsonify({"success": success, "msg": msg, "counts": counts}), 400
+    return jsonify({"success": success, "msg": msg, "counts": counts}), 200
+
+
+@apiRoutes.route('/detections/export', methods=['POST'])
+def export_detections_route():
+    """Stream the detections of one request ({req_id}) or of a time range ({since, until,
+    category, label, min_confidence, max_confidence}) as CSV or Parquet ({format})."""
+    msg = ""
+
+    try:
+        data = request.get_json()
+        export_format = data.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            msg = f"format must be one of: {', '.join(EXPORT_FORMATS)}"
+            raise ValueError(msg)
+
+        filters, msg = parse_search(data)
+        if msg:
+            raise ValueError(msg)
+        req_id = data.get('req_id')
+        if req_id is not None and not isinstance(req_id, str):
+            msg = "req_id must be a string"
+            raise ValueError(msg)
+        if req_id is None and filters['since'] is None:
+            msg = "req_id or since is required"
+            raise ValueError(msg)
+        if req_id is not None:
+            req_id = resolve_req_id(req_id)
+    except Exception as e:
+        logger.warning(f"export_detections_route(): {e}")
+        msg = msg or ErrorMessages.GENERIC_ERROR.value
+        return jsonify({"success": False, "msg": msg}), 400
+
+    name = req_id or f"detections_{filters['since'].date().isoformat()}"
+    return Response(
+        stream_export(export_format, req_id=req_id, **filters),
+        mimetype=MIMETYPES[export_format],
+        headers={"Content-Disposition": f"attachment; filename={name}.{export_format}"},
+    )
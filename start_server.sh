@@ -1,7 +1,10 @@
-echo "Starting classifier server at port 8000"
+export WORKERS=${WORKERS:-1}
+export THREADS=${THREADS:-1}
+export PORT=${PORT:-8000}
+export TIMEOUT=${TIMEOUT:-300}
+export LOG_LEVEL=${LOG_LEVEL:-debug}
+export PRELOAD_APP=${PRELOAD_APP:-0}
 
-THREADS=1
-PORT=8000
-TIMEOUT=300
+echo "Starting classifier server at port $PORT"
 
-gunicorn -w $THREADS -b 0.0.0.0:$PORT --timeout $TIMEOUT --log-level debug main:app
\ No newline at end of file
+gunicorn -c gunicorn.conf.py main:app
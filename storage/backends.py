@@ -0,0 +1,22 @@
+import threading
+from storage.local import LocalStorage
+
+local_storage = LocalStorage()
+_s3_storage = None
+_s3_lock = threading.Lock()
+
+def is_remote(path):
+    return path.startswith('s3://')
+
+def get_storage(path):
+    """Return the storage backend for a path: s3:// URLs go to the object store, anything
+    else is a local path. The S3 client is created on first use, so boto3 is only
+    needed when object storage is used."""
+    global _s3_storage
+    if not is_remote(path):
+        return local_storage
+    with _s3_lock:
+        if _s3_storage is None:
+            from storage.s3 import S3Storage
+            _s3_storage = S3Storage()
+    return _s3_storage
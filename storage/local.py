@@ -0,0 +1,27 @@
+import os
+from classification.archives import member_path, split_member_path
+
+class LocalStorage:
+    """Local POSIX paths."""
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    def canonical(self, path):
+        """The real path of a file. For an archive member only the archive path is
+        resolved: member names are looked up exactly as stored, e.g. "./a.jpg"."""
+        archive_path, member = split_member_path(path)
+        if member is not None:
+            return member_path(os.path.realpath(archive_path), member)
+        return os.path.realpath(path)
+
+    def list(self, path, extensions, max_items):
+        """Sorted paths of the files directly in a folder with one of the given extensions."""
+        return [
+            os.path.join(path, f) for f in sorted(os.listdir(path))
+            if os.path.splitext(f.lower())[1] in extensions
+        ][:max_items]
+
+    def read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+import data.env as env
+
+SCHEME = 's3://'
+
+def split_url(url):
+    """Return (bucket, key) of an s3://bucket/key URL."""
+    bucket, _, key = url[len(SCHEME):].partition('/')
+    return bucket, key
+
+class S3Storage:
+    """S3-compatible object store (AWS S3, MinIO). Credentials come from the standard
+    AWS environment variables or config files; S3_ENDPOINT_URL points it at MinIO.
+
+    One client is shared by every thread. Its connection pool holds S3_MAX_CONNECTIONS
+    keep-alive connections. Reads are issued only by the decode pool of
+    sources.iter_decoded, which has S3_MAX_CONNECTIONS threads that each run one GET at
+    a time, so in-flight GETs never exceed the pool."""
+
+    def __init__(self):
+        try:
+            import boto3
+            from botocore.config import Config
+            from botocore.exceptions import BotoCoreError
+        except ImportError:
+            raise ImportError("boto3 is required for s3:// paths. Install it with: pip install boto3")
+        self.client = boto3.client(
+            's3',
+            endpoint_url=env.S3_ENDPOINT_URL or None,
+            region_name=env.S3_REGION or None,
+            config=Config(
+                max_pool_connections=env.S3_MAX_CONNECTIONS,
+                retries={'max_attempts': env.S3_MAX_ATTEMPTS, 'mode': 'standard'},
+            ),
+        )
+        # Object sizes seen while listing, so large objects can be split into ranged GETs
+        # without a HEAD request first.
+        self._sizes = {}
+        self._sizes_lock = threading.Lock()
+        self._transient_errors = BotoCoreError
+
+    def canonical(self, path):
+        return path
+
+    def _folder_prefix(self, key):
+        return key if not key or key.endswith('/') else key + '/'
+
+    def exists(self, path):
+        bucket, key = split_url(path)
+        response = self.client.list_objects_v2(Bucket=bucket, Prefix=key, MaxKeys=1)
+        return response.get('KeyCount', 0) > 0
+
+    def list(self, path, extensions, max_items):
+        """Objects directly under a prefix with one of the given extensions, in key
+        order. S3 already lists keys sorted, so pagination stops after max_items."""
+        bucket, key = split_url(path)
+        prefix = self._folder_prefix(key)
+        paths = []
+        sizes = {}
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix, Delimiter='/'):
+            for item in page.get('Contents', []):
+                name = item['Key']
+                if os.path.splitext(name.lower())[1] in extensions:
+                    url = f"{SCHEME}{bucket}/{name}"
+                    paths.append(url)
+                    sizes[url] = item['Size']
+                    if len(paths) >= max_items:
+                        break
+            if len(paths) >= max_items:
+                break
+        with self._sizes_lock:
+            if len(self._sizes) > 100000:
+                self._sizes.clear()
+            self._sizes.update(sizes)
+        return paths
+
+    def _get(self, bucket, key, byte_range=None):
+        """One GET. botocore retries the request itself; a body that breaks off while
+        streaming (timeout, reset, incomplete read) is fetched again here, with the
+        same number of attempts."""
+        kwargs = {'Bucket': bucket, 'Key': key}
+        if byte_range is not None:
+            kwargs['Range'] = f"bytes={byte_range[0]}-{byte_range[1]}"
+        for attempt in range(env.S3_MAX_ATTEMPTS):
+            try:
+                return self.client.get_object(**kwargs)['Body'].read()
+            except self._transient_errors:
+                if attempt + 1 == env.S3_MAX_ATTEMPTS:
+                    raise
+                time.sleep(0.1 * 2 ** attempt)
+
+    def read(self, path):
+        """Object bytes. Objects above S3_RANGE_BYTES are fetched as consecutive ranged
+        GETs, so a failure only repeats one range rather than the whole object."""
+        bucket, key = split_url(path)
+        with self._sizes_lock:
+            size = self._sizes.get(path)
+        part = env.S3_RANGE_BYTES
+        if not size or size <= part:
+            return self._get(bucket, key)
+        return b''.join(
+            self._get(bucket, key, (start, min(start + part, size) - 1)) for start in range(0, size, part)
+        )
@@ -0,0 +1,12 @@
+import os
+
+# data/env.py refuses to load without these. Nothing under tests/ connects; port 1
+# makes the connection attempt of database.postgres at import time fail at once.
+for name, value in (
+    ('POSTGRES_DB', 'classifier_test'),
+    ('POSTGRES_USER', 'classifier'),
+    ('POSTGRES_PASSWORD', 'classifier'),
+    ('POSTGRES_HOST', '127.0.0.1'),
+    ('POSTGRES_PORT', '1'),
+):
+    os.environ.setdefault(name, value)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+try:
+    from classification import annotate
+except Exception as e:
+    # database.postgres connects when it is imported.
+    pytest.skip(f"classification.annotate needs a reachable Postgres: {e}", allow_module_level=True)
+
+def test_render_cache_evicts_least_recently_used_by_size():
+    cache = annotate.RenderCache(max_bytes=10)
+    cache.set('a', b'aaaa')
+    cache.set('b', b'bbbb')
+    assert cache.get('a') == b'aaaa'
+    cache.set('c', b'cccc')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == b'aaaa'
+    assert cache.get('c') == b'cccc'
+    assert cache.metrics()['bytes'] == 8
+
+def test_render_cache_skips_entries_larger_than_the_cache():
+    cache = annotate.RenderCache(max_bytes=4)
+    cache.set('big', b'12345')
+    assert cache.get('big') is None
+    assert cache.metrics()['entries'] == 0
+
+@pytest.fixture
+def stored(monkeypatch):
+    """Detections of one image as the database would return them, editable by the test."""
+    boxes = [('car', (10, 10, 20, 20), 0.9)]
+    reads = []
+    monkeypatch.setattr(annotate, 'annotation_cache', annotate.RenderCache(1024 * 1024))
+    monkeypatch.setattr(annotate, 'resolve_req_id', lambda req_id: 'primary')
+    monkeypatch.setattr(annotate, 'fetch_detections', lambda req_id, image: ('/data/a.jpg', list(boxes)))
+
+    def read_image(path):
+        reads.append(path)
+        return np.zeros((64, 64, 3), dtype=np.uint8)
+
+    monkeypatch.setattr(annotate, 'read_image', read_image)
+    return boxes, reads
+
+def test_render_is_reused_while_the_boxes_are_unchanged(stored):
+    _, reads = stored
+    first = annotate.render_annotated('alias', 'a.jpg')
+    assert annotate.render_annotated('alias', 'a.jpg') == first
+    assert reads == ['/data/a.jpg']
+
+def test_render_is_redone_after_a_checkpoint_adds_boxes(stored):
+    boxes, reads = stored
+    first = annotate.render_annotated('req', 'a.jpg')
+    boxes.append(('truck', (40, 40, 10, 10), 0.8))
+    second = annotate.render_annotated('req', 'a.jpg')
+    assert second != first
+    assert len(reads) == 2
@@ -0,0 +1,36 @@
+import io
+import os
+import tarfile
+from classification.archives import list_members, member_path, read_member, split_member_path
+from storage.local import LocalStorage
+
+def write_tar(path, members):
+    with tarfile.open(path, 'w') as tar:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+def test_dot_prefixed_tar_members_survive_canonical(tmp_path):
+    # `tar -C dir .` stores members as "./a.jpg".
+    archive = str(tmp_path / "images.tar")
+    write_tar(archive, {"./a.jpg": b"first", "./sub/b.jpg": b"second"})
+
+    names = list_members(archive, {'.jpg'})
+    assert names == ["./a.jpg", "./sub/b.jpg"]
+
+    for name, data in zip(names, (b"first", b"second")):
+        canonical = LocalStorage().canonical(member_path(archive, name))
+        archive_path, member = split_member_path(canonical)
+        assert archive_path == os.path.realpath(archive)
+        assert member == name
+        assert read_member(archive_path, member) == data
+
+def test_canonical_resolves_symlinked_archive(tmp_path):
+    archive = str(tmp_path / "images.tar")
+    write_tar(archive, {"a.jpg": b"data"})
+    link = str(tmp_path / "link.tar")
+    os.symlink(archive, link)
+
+    canonical = LocalStorage().canonical(member_path(link, "a.jpg"))
+    assert canonical == member_path(os.path.realpath(archive), "a.jpg")
@@ -0,0 +1,43 @@
+from classification.coalescing import InflightRegistry, coalesce_key
+
+def item(r_id, path, category='cars', options=None):
+    return {'r_id': r_id, 'abs_path': path, 'category': category, 'options': options}
+
+def test_same_tenant_attaches_to_running_job(tmp_path):
+    registry = InflightRegistry(window=30)
+    primary = {'req_id': 'a'}
+    assert registry.claim(coalesce_key(item('tenant-a', str(tmp_path))), primary) is None
+    assert registry.claim(coalesce_key(item('tenant-a', str(tmp_path))), {'req_id': 'b'}) is primary
+    assert registry.metrics()['coalesced'] == 1
+
+def test_tenants_submitting_the_same_path_get_separate_jobs(tmp_path):
+    registry = InflightRegistry(window=30)
+    assert registry.claim(coalesce_key(item('tenant-a', str(tmp_path))), {'req_id': 'a'}) is None
+    assert registry.claim(coalesce_key(item('tenant-b', str(tmp_path))), {'req_id': 'b'}) is None
+    assert registry.metrics() == {'inflight': 2, 'recent': 0, 'coalesced': 0}
+
+def test_finished_job_is_shared_for_the_window_then_expires(tmp_path, monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr('classification.coalescing.time.monotonic', lambda: clock[0])
+    registry = InflightRegistry(window=30)
+    key = coalesce_key(item('tenant-a', str(tmp_path)))
+    primary = {'req_id': 'a'}
+    registry.claim(key, primary)
+    registry.release(primary)
+
+    clock[0] += 29
+    assert registry.claim(key, {'req_id': 'b'}) is primary
+    assert registry.metrics()['recent'] == 1
+
+    clock[0] += 2
+    retry = {'req_id': 'c'}
+    assert registry.claim(key, retry) is None
+    assert registry.metrics()['inflight'] == 1
+
+def test_forgotten_job_is_not_shared(tmp_path):
+    registry = InflightRegistry(window=30)
+    key = coalesce_key(item('tenant-a', str(tmp_path)))
+    failed = {'req_id': 'a'}
+    registry.claim(key, failed)
+    registry.forget(failed)
+    assert registry.claim(key, {'req_id': 'b'}) is None
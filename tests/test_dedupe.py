@@ -0,0 +1,48 @@
+import random
+from classification.dedupe import BKTree, DuplicateIndex, hamming
+
+def brute_force(entries, key, max_distance):
+    """Smallest distance within max_distance and the values stored at that distance."""
+    distances = [(hamming(key, entry_key), value) for entry_key, value in entries]
+    within = [(distance, value) for distance, value in distances if distance <= max_distance]
+    if not within:
+        return None, set()
+    best = min(distance for distance, _ in within)
+    return best, {value for distance, value in within if distance == best}
+
+def test_nearest_matches_brute_force_hamming_search():
+    rng = random.Random(7)
+    entries = []
+    tree = BKTree()
+    base = [rng.getrandbits(64) for _ in range(20)]
+    for index in range(500):
+        # Clusters of nearby hashes, as burst frames of one scene produce.
+        key = rng.choice(base)
+        for _ in range(rng.randrange(12)):
+            key ^= 1 << rng.randrange(64)
+        entries.append((key, index))
+        tree.add(key, index)
+    assert tree.size == 500
+
+    for _ in range(300):
+        query = rng.choice(base)
+        for _ in range(rng.randrange(16)):
+            query ^= 1 << rng.randrange(64)
+        max_distance = rng.randrange(10)
+        best, values = brute_force(entries, query, max_distance)
+        match = tree.nearest(query, max_distance)
+        if best is None:
+            assert match is None
+        else:
+            assert match[0] == best
+            assert match[1] in values
+
+def test_empty_tree_finds_nothing():
+    assert BKTree().nearest(0, 64) is None
+
+def test_duplicate_index_separates_keys():
+    index = DuplicateIndex(max_distance=2)
+    index.add(('cars', ()), 0b1011, ['car'])
+    assert index.find(('cars', ()), 0b1001) == ['car']
+    assert index.find(('cars', ()), 0b0100) is None
+    assert index.find(('animals', ()), 0b1011) is None
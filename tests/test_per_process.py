@@ -0,0 +1,36 @@
+import threading
+from data.per_process import PerProcess
+
+def test_claim_is_granted_once_when_threads_race():
+    once = PerProcess()
+    threads = 16
+    barrier = threading.Barrier(threads)
+    granted = []
+
+    def contend():
+        barrier.wait()
+        if once.claim():
+            granted.append(threading.get_ident())
+
+    workers = [threading.Thread(target=contend) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    assert len(granted) == 1
+    assert once.done()
+
+def test_claim_again_after_the_pid_changes(monkeypatch):
+    once = PerProcess()
+    assert once.claim()
+    assert not once.claim()
+    # A forked worker inherits the mark but has its own pid.
+    monkeypatch.setattr('data.per_process.os.getpid', lambda: -1)
+    assert not once.done()
+    assert once.claim()
+
+def test_reset_allows_setup_again():
+    once = PerProcess()
+    once.mark()
+    once.reset()
+    assert once.claim()
@@ -0,0 +1,85 @@
+import threading
+import time
+from classification.scheduler import PRIORITY_BULK, PRIORITY_INTERACTIVE, Scheduler
+
+class FakeTask:
+    """A task of chunks chunks per tenant that records every turn it is given."""
+
+    def __init__(self, tenants, chunks, priority=PRIORITY_BULK, log=None, gate=None):
+        self.tenants = list(tenants)
+        self.priority = priority
+        self.submitted_at = time.time()
+        self.started_at = {}
+        self.left = {tenant: chunks for tenant in self.tenants}
+        self.log = log if log is not None else []
+        self.gate = gate
+        self.running = 0
+        self.overlapped = False
+        self.finished = threading.Event()
+        self.finish_calls = 0
+        self.started = threading.Event()
+
+    def remaining(self, tenant):
+        return self.left[tenant]
+
+    def run_chunk(self, chunk_size, tenant):
+        self.running += 1
+        self.overlapped = self.overlapped or self.running > 1
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait()
+        time.sleep(0.001)
+        self.left[tenant] -= 1
+        self.log.append((tenant, self.priority))
+        self.running -= 1
+        return self.left[tenant] > 0
+
+    def fail(self, error):
+        raise AssertionError(error)
+
+    def finish(self):
+        self.finish_calls += 1
+        self.finished.set()
+
+def run(scheduler, tasks):
+    """Submit tasks while a gated task holds the only worker, so the order they run in is
+    decided by the scheduler and not by submission timing."""
+    gate = threading.Event()
+    blocker = FakeTask(['gate'], 1, gate=gate)
+    scheduler.submit(blocker)
+    assert blocker.started.wait(5)
+    for task in tasks:
+        scheduler.submit(task)
+    gate.set()
+    for task in [blocker] + tasks:
+        assert task.finished.wait(5)
+
+def test_tenants_take_turns_one_chunk_at_a_time():
+    log = []
+    tasks = [FakeTask(['a'], 3, log=log), FakeTask(['b'], 2, log=log), FakeTask(['c'], 1, log=log)]
+    run(Scheduler(1, 1, 4), tasks)
+    assert [tenant for tenant, _ in log] == ['a', 'b', 'c', 'a', 'b', 'a']
+
+def test_interactive_runs_first_but_bulk_gets_every_nth_chunk():
+    log = []
+    bulk = FakeTask(['x'], 3, PRIORITY_BULK, log=log)
+    interactive = FakeTask(['i'], 5, PRIORITY_INTERACTIVE, log=log)
+    run(Scheduler(1, 1, 2), [bulk, interactive])
+    assert [tenant for tenant, _ in log] == ['i', 'i', 'x', 'i', 'i', 'x', 'i', 'x']
+
+def test_shared_task_runs_for_each_tenant_but_never_twice_at_once():
+    log = []
+    shared = FakeTask(['a', 'b'], 3, log=log)
+    run(Scheduler(2, 1, 4), [shared])
+    assert sorted(tenant for tenant, _ in log) == ['a'] * 3 + ['b'] * 3
+    assert not shared.overlapped
+    assert shared.finish_calls == 1
+
+def test_metrics_report_wait_per_tenant():
+    scheduler = Scheduler(1, 1, 4)
+    run(scheduler, [FakeTask(['a'], 1), FakeTask(['b'], 1)])
+    metrics = scheduler.metrics()
+    assert metrics['queue_depth'] == {PRIORITY_INTERACTIVE: 0, PRIORITY_BULK: 0}
+    assert metrics['running'] == 0
+    assert {'a', 'b', 'gate'} <= set(metrics['tenants'])
+    assert metrics['tenants']['a']['max_wait_seconds'] >= 0
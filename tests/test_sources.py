@@ -0,0 +1,29 @@
+import cv2
+import numpy as np
+import pytest
+from classification.sources import sample_frames
+
+@pytest.fixture
+def video(tmp_path):
+    path = str(tmp_path / 'clip.avi')
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (32, 32))
+    if not writer.isOpened():
+        pytest.skip("OpenCV cannot write MJPG video here")
+    for i in range(20):
+        writer.write(np.full((32, 32, 3), i * 10, dtype=np.uint8))
+    writer.release()
+    return path
+
+def test_frames_are_sampled_every_stride(video):
+    assert [index for index, _, _ in sample_frames(video, stride=5, max_frames=100)] == [0, 5, 10, 15]
+
+def test_sampling_stops_once_should_stop_is_true(video):
+    checks = []
+
+    def should_stop():
+        checks.append(1)
+        return len(checks) > 7
+
+    # The check runs before every grab, skipped frames included.
+    assert [index for index, _, _ in sample_frames(video, stride=5, max_frames=100, should_stop=should_stop)] == [0, 5]
+    assert len(checks) == 8
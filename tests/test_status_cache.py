@@ -0,0 +1,36 @@
+from database.status_cache import StatusCache
+
+def test_entry_expires_after_ttl(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr('database.status_cache.time.monotonic', lambda: clock[0])
+    cache = StatusCache(max_size=10, ttl=30)
+    cache.set('req', 'processing')
+
+    clock[0] = 29.9
+    assert cache.get('req') == 'processing'
+    clock[0] = 30.0
+    assert cache.get('req') is None
+    assert cache.metrics()['size'] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_set_refreshes_status_and_ttl(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr('database.status_cache.time.monotonic', lambda: clock[0])
+    cache = StatusCache(max_size=10, ttl=30)
+    cache.set('req', 'queued')
+    clock[0] = 20.0
+    cache.set('req', 'cancelling')
+    clock[0] = 40.0
+    assert cache.get('req') == 'cancelling'
+
+def test_least_recently_used_entry_is_evicted():
+    cache = StatusCache(max_size=2, ttl=30)
+    cache.set('a', 'queued')
+    cache.set('b', 'queued')
+    assert cache.get('a') == 'queued'
+    cache.set('c', 'queued')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 'queued'
+    assert cache.get('c') == 'queued'
+    assert cache.metrics()['size'] == 2
@@ -0,0 +1,20 @@
+import data.env as env
+from classification.thread_budget import compute_budget
+
+def test_compute_threads_are_shared_by_the_scheduler_workers(monkeypatch):
+    for name in ['DECODE_THREADS', 'TORCH_THREADS', 'TF_INTRA_OP_THREADS', 'TF_INTER_OP_THREADS', 'OPENCV_THREADS']:
+        monkeypatch.setattr(env, name, None)
+    budget = compute_budget(cores=32, workers=2, scheduler_workers=3)
+    assert budget['per_worker'] == 16
+    assert budget['decode_threads'] == 4
+    assert budget['torch_threads'] == budget['tf_intra_op_threads'] == 4
+
+def test_compute_threads_never_drop_below_one(monkeypatch):
+    for name in ['DECODE_THREADS', 'TORCH_THREADS', 'TF_INTRA_OP_THREADS', 'TF_INTER_OP_THREADS', 'OPENCV_THREADS']:
+        monkeypatch.setattr(env, name, None)
+    budget = compute_budget(cores=2, workers=1, scheduler_workers=8)
+    assert budget['torch_threads'] == budget['tf_intra_op_threads'] == 1
+
+def test_environment_overrides_the_computed_pools(monkeypatch):
+    monkeypatch.setattr(env, 'TORCH_THREADS', '6')
+    assert compute_budget(cores=32, workers=2, scheduler_workers=3)['torch_threads'] == 6
@@ -0,0 +1,85 @@
+import numpy as np
+from classification.tiling import detect_tiled, nms, split_tiles
+
+class Tensor:
+    def __init__(self, values):
+        self.values = np.asarray(values)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.values.copy()
+
+class Boxes:
+    def __init__(self, rows):
+        rows = np.asarray(rows, dtype=float).reshape(-1, 6)
+        self.xyxy, self.conf, self.cls = Tensor(rows[:, :4]), Tensor(rows[:, 4]), Tensor(rows[:, 5])
+
+    def __len__(self):
+        return len(self.xyxy.values)
+
+class Result:
+    def __init__(self, rows):
+        self.boxes = Boxes(rows)
+
+class TileDetector:
+    """Returns the same boxes, in each input's own coordinates, for every input."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def __call__(self, inputs, **predict):
+        self.calls.append(predict)
+        return [Result(self.rows) for _ in inputs]
+
+def test_nms_keeps_the_best_of_overlapping_boxes():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [20, 20, 30, 30]], dtype=float)
+    scores = np.array([0.6, 0.9, 0.5])
+    assert nms(boxes, scores, 0.5) == [1, 2]
+
+def test_nms_keeps_boxes_below_the_iou_threshold():
+    boxes = np.array([[0, 0, 10, 10], [5, 0, 15, 10]], dtype=float)
+    scores = np.array([0.9, 0.8])
+    # IoU is 50 / 150 = 0.33.
+    assert nms(boxes, scores, 0.5) == [0, 1]
+    assert nms(boxes, scores, 0.3) == [0]
+
+def test_object_seen_by_several_tiles_is_merged_once_per_class():
+    img = np.random.default_rng(0).integers(0, 255, (100, 100, 3), dtype=np.uint8)
+    origins = [(0, 0)] + [(x0, y0) for x0, y0, _ in split_tiles(img, 60, 0.5, 0)]
+    # A car and a truck on the same image region; every input that fully contains the
+    # region reports both in its own coordinates, slightly less sure in the tiles.
+    region = (35, 35, 65, 65)
+
+    class Detector:
+        def __call__(self, inputs, **predict):
+            results = []
+            for index, (x0, y0) in enumerate(origins):
+                x1, y1, x2, y2 = region[0] - x0, region[1] - y0, region[2] - x0, region[3] - y0
+                size = 100 if index == 0 else 60
+                if min(x1, y1) < 0 or max(x2, y2) > size:
+                    results.append(Result([]))
+                    continue
+                confidence = 0.9 if index == 0 else 0.8
+                results.append(Result([[x1, y1, x2, y2, confidence, 2], [x1, y1, x2, y2, confidence - 0.1, 7]]))
+            return results
+
+    detections = detect_tiled(Detector(), img, tile_size=60, overlap=0.5, min_variance=0, iou_threshold=0.5)
+    assert sorted((cls, xywh) for cls, xywh, _ in detections) == [(2, (50, 50, 30, 30)), (7, (50, 50, 30, 30))]
+    assert {cls: round(confidence, 2) for cls, _, confidence in detections} == {2: 0.9, 7: 0.8}
+
+def test_max_det_caps_the_merged_boxes_by_confidence():
+    img = np.random.default_rng(0).integers(0, 255, (100, 100, 3), dtype=np.uint8)
+    # Every input reports the same three boxes in its own coordinates, so the tiles add
+    # boxes at new image positions and the merge ends with far more than max_det.
+    detector = TileDetector([[0, 0, 10, 10, 0.9, 2], [40, 40, 50, 50, 0.7, 2], [0, 40, 10, 50, 0.8, 7]])
+    uncapped = detect_tiled(detector, img, tile_size=60, overlap=0.5, min_variance=0)
+    detections = detect_tiled(detector, img, tile_size=60, overlap=0.5, min_variance=0, max_det=3)
+
+    assert detector.calls[-1] == {'max_det': 3}
+    assert len(uncapped) > 3
+    assert len(detections) == 3
+    best = sorted((confidence for _, _, confidence in uncapped), reverse=True)[:3]
+    assert [confidence for _, _, confidence in detections] == best